@@ -1,3 +1,11 @@
 from .construct import *
 from .converters import *
 from .structure import Nil
+
+
+def __getattr__(name):
+    # `inspect` was exported through `from .construct import *`. it is imported lazily now
+    if name == "inspect":
+        import inspect
+        return inspect
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
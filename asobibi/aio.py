@@ -0,0 +1,158 @@
+# -*- coding:utf-8 -*-
+"""asyncio support. (python3 only, so this module is not imported from asobibi/__init__.py)"""
+import asyncio
+from inspect import isawaitable
+from .construct import compile_fields, Nested
+from .exceptions import ValidationError
+from .structure import Nil, Invalid
+
+_unset = object()
+
+
+async def avalidate_schema(self):
+    if not self._configured:
+        self.result = await _avalidate(self)
+        self._configured = True
+        if self._materialize is not None and not self.errors:
+            self._materialize()
+    return not self.errors
+
+
+async def _avalidate(self):
+    plan = getattr(self, "_plan", None) or compile_fields(self._fields, self._opt_handler)
+    rawdata = self.rawdata
+    except_errors = self._except_errors
+    if self._options["flatten"]:
+        result, errors = await _convert_flat(self, plan, rawdata, self._result_factory, except_errors, "")
+        for k, e in errors:
+            result = self.on_failure(result, k, e)
+            if self._fail_fast:
+                break
+        return result
+    outcomes = await asyncio.gather(*[_convert_field(k, required, converters, rawdata, except_errors)
+                                      for k, required, converters in plan])
+
+    # errors are collected in field order, same as the sync path
+    result = self._result_factory()
+    for (k, _, _), (val, errors) in zip(plan, outcomes):
+        if val is not _unset:
+            result[k] = val
+        for e in errors:
+            result = self.on_failure(result, k, e)
+            if self._fail_fast:
+                return result
+    return result
+
+
+async def _convert_flat(self, plan, rawdata, result_factory, except_errors, prefix):
+    """flatten=True version. nested schemas are validated in the same pass (see construct._run_flat).
+    returns (result, [(dotted key, error)])"""
+    outcomes = await asyncio.gather(*[_convert_entry(self, k, required, converters, rawdata, except_errors, prefix)
+                                      for k, required, converters in plan])
+    result = result_factory()
+    errors = []
+    for (k, _, _), (val, entry_errors) in zip(plan, outcomes):
+        if val is not _unset:
+            result[k] = val
+        if entry_errors:
+            result = result.on_failure()
+            errors.extend(entry_errors)
+    return result, errors
+
+
+async def _convert_entry(self, k, required, converters, rawdata, except_errors, prefix):
+    key = prefix + k
+    if converters.__class__ is not Nested:
+        val, errors = await _convert_field(k, required, converters, rawdata, except_errors)
+        return val, [(key, e) for e in errors]
+    val = _unset
+    try:
+        val = rawdata[k]
+        if val is Nil:
+            if required:
+                return _unset, [(key, ValidationError(dict(name="*missing", field=k, value=val)))]
+            return val, []
+        schema = converters.schema
+        sub_rawdata = schema._build_rawdata(val, (), schema._fields)
+    except KeyError as e:
+        return val, ([(key, e)] if required else [])
+    except except_errors as e:
+        return val, [(key, e)]  # same as sync path, the input value is kept
+    return await _convert_flat(self, converters.plan, sub_rawdata, schema._result_factory,
+                               schema._except_errors, key + ".")
+
+
+async def _convert_field(k, required, converters, rawdata, except_errors):
+    """returns (value, errors)"""
+    current = _unset
+    errors = []
+    try:
+        val = rawdata[k]
+        if val is Nil:
+            if required:
+                errors.append(ValidationError(dict(name="*missing", field=k, value=val)))
+                return current, errors
+            return val, errors
+        current = val
+        for convert in converters:
+            val = convert(k, val)
+            if isawaitable(val):
+                val = await val
+            if val.__class__ is Invalid:
+                errors.append(val)
+                break
+            # field is schema
+            if hasattr(val, "validate"):
+                if hasattr(val, "avalidate"):
+                    status = await val.avalidate()
+                else:
+                    status = val.validate()
+                if not status:
+                    errors.append(val.errors)
+                val = val.result
+            current = val
+            if val is Nil:
+                break
+    except KeyError as e:
+        if required:
+            errors.append(e)
+        else:
+            current = rawdata[k]
+    except except_errors as e:
+        errors.append(e)
+    return current, errors
+
+
+async def avalidate_validator(self):
+    nested_status = await self.schema.avalidate()
+    if self._fail_fast and not nested_status:
+        return False
+    status = await _avalidate_converters(self)
+    return nested_status and status
+
+
+async def _avalidate_converters(self):
+    result = self.result
+    targets = [(i, fields, extra_fields, validator)
+               for i, (fields, extra_fields, validator, _) in enumerate(self._converters)
+               if all(result.get(k, Nil) != Nil for k in fields)]
+    errors = await asyncio.gather(*[_check(self, validator, fields, result, extra_fields)
+                                    for _, fields, extra_fields, validator in targets])
+    for (i, fields, _, _), e in zip(targets, errors):
+        if e is not None:
+            result = self.on_failure(result, fields[0], e)
+            self._issued[i] = self.errors[fields[0]][-1]  # for update(), same as the sync path
+            if self._fail_fast:
+                break
+    self.result = result
+    return self.schema.errors is None
+
+
+async def _check(self, validator, fields, result, extra_fields):
+    try:
+        r = self._apply_dispatch(validator, fields, result, extra_fields, self.extra)
+        if isawaitable(r):
+            r = await r
+    except self._except_errors as e:
+        return e
+    return r if r.__class__ is Invalid else None
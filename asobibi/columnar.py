@@ -0,0 +1,164 @@
+# -*- coding:utf-8 -*-
+"""columnar validation with numpy. (numpy is optional, so this module is not imported from asobibi/__init__.py)
+
+columns are validated field by field. converters having vectorized form (Int, Float,
+and validation_from_condition(..., vectorized=...)) are applied to a whole column at once.
+after the first converter without vectorized form, the rest are applied row by row.
+"""
+from collections import namedtuple
+from .construct import compile_fields
+from .converters import Int, Float
+from .exceptions import ValidationError
+from .structure import Nil, Invalid
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+ColumnarResult = namedtuple("ColumnarResult", "mask, columns, errors")
+ColumnarResult.__doc__ = """mask: valid rows (bool array), columns: converted columns, errors: field -> [(row, error)]"""
+
+
+def _nonfinite_error(x):
+    """same error as int(x) (ValueError for nan, OverflowError for inf)"""
+    try:
+        int(x)
+    except (ValueError, OverflowError) as e:
+        return e
+
+
+def _int_column(k, xs):
+    kind = xs.dtype.kind
+    if kind == "u" and len(xs) and xs.max() >= 2 ** 63:
+        return None  # doesn't fit in int64
+    if kind in "iub":
+        return xs.astype(np.int64), None
+    if kind == "f":
+        finite = np.isfinite(xs)
+        if np.any(np.abs(xs[finite]) >= 2 ** 63):
+            return None  # doesn't fit in int64
+        ys = np.zeros(len(xs), dtype=np.int64)
+        ys[finite] = xs[finite].astype(np.int64)
+        bad = ~finite
+        return ys, (bad, lambda i: _nonfinite_error(xs.item(i)))
+    return None
+
+
+def _float_column(k, xs):
+    if xs.dtype.kind in "iubf":
+        return xs.astype(np.float64), None
+    return None
+
+
+VECTORIZED = {Int: _int_column, Float: _float_column}
+
+
+def get_vectorized(convert):
+    """converter -> fn(k, array) -> (array, (bad_mask, error_factory) or None) or None (not vectorizable)"""
+    fn = VECTORIZED.get(convert)
+    if fn is not None:
+        return fn
+    condition = getattr(convert, "_vectorized_condition", None)
+    if condition is not None:
+        return _condition_column(convert, *condition)
+    return None
+
+
+def _condition_column(convert, cond, fmt):
+    name = convert.__name__
+
+    def column(k, xs):
+        ok = np.asarray(cond(xs), dtype=bool)
+        bad = ~ok
+
+        def error(i):
+            return ValidationError(dict(fmt=fmt, field=k, result=False, value=xs.item(i), condition=name))
+        return xs, (bad, error)
+    return column
+
+
+def as_column_dict(columns):
+    names = getattr(getattr(columns, "dtype", None), "names", None)
+    if names is not None:  # structured array
+        return dict((k, columns[k]) for k in names)
+    return columns
+
+
+def validate_columns(schema, columns):
+    """dict of arrays (or structured array) -> ColumnarResult"""
+    if np is None:  # pragma: no cover
+        raise ImportError("numpy is required for columnar validation")
+    columns = as_column_dict(columns)
+    size = len(next(iter(columns.values()))) if columns else 0
+    mask = np.ones(size, dtype=bool)
+    converted = {}
+    errors = {}
+    except_errors = schema._except_errors
+    for (k, options), (_, required, converters) in zip(schema._fields, compile_fields(schema._fields, schema._opt_handler)):
+        if k not in columns:
+            value = schema._opt_handler.get_default_value(options, schema._missing, KeyError(k))
+            xs = np.empty(size, dtype=object)
+            xs[:] = [value] * size
+        else:
+            xs = np.asarray(columns[k])
+        field_errors = []
+        bad = np.zeros(size, dtype=bool)
+        rest = list(converters)
+        while rest and xs.dtype != object:
+            vectorized = get_vectorized(rest[0])
+            if vectorized is None:
+                break
+            r = vectorized(k, xs)
+            if r is None:
+                break
+            xs, failed = r
+            rest.pop(0)
+            if failed is not None:
+                failed_mask, error = failed
+                for i in np.flatnonzero(failed_mask & ~bad):
+                    field_errors.append((int(i), error(i)))
+                bad |= failed_mask
+        if rest or xs.dtype == object:
+            xs = _convert_rows(k, required, rest, xs, bad, field_errors, except_errors)
+        if field_errors:
+            field_errors.sort(key=lambda x: x[0])
+            errors[k] = field_errors
+        mask &= ~bad
+        converted[k] = xs
+    return ColumnarResult(mask, converted, errors)
+
+
+def _convert_rows(k, required, converters, xs, bad, field_errors, except_errors):
+    """fallback. same as schema's on_validate, row by row"""
+    ys = np.empty(len(xs), dtype=object)
+    for i in range(len(xs)):
+        val = xs.item(i)
+        ys[i] = val
+        if bad[i]:
+            continue
+        try:
+            if val is Nil:
+                if required:
+                    bad[i] = True
+                    field_errors.append((i, ValidationError(dict(name="*missing", field=k, value=val))))
+                continue
+            for convert in converters:
+                val = convert(k, val)
+                if val.__class__ is Invalid:
+                    bad[i] = True
+                    field_errors.append((i, val.error()))
+                    break
+                if hasattr(val, "validate"):
+                    if not val.validate():
+                        bad[i] = True
+                        field_errors.append((i, val.errors))
+                    val = val.result
+                ys[i] = val
+                if val is Nil:
+                    break
+        except except_errors as e:
+            bad[i] = True
+            field_errors.append((i, e))
+    return ys
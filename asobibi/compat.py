@@ -45,5 +45,29 @@ try:
 except ImportError: # pragma: no cover
     from io import StringIO as NativeIO
 
+try:
+    from types import MappingProxyType
+except ImportError: # pragma: no cover
+    from collections import Mapping
+
+    class MappingProxyType(Mapping):
+        """read only view of dict (python2)"""
+        __slots__ = ("_mapping",)
+
+        def __init__(self, mapping):
+            self._mapping = mapping
+
+        def __getitem__(self, k):
+            return self._mapping[k]
+
+        def __iter__(self):
+            return iter(self._mapping)
+
+        def __len__(self):
+            return len(self._mapping)
 
+        def copy(self):
+            return self._mapping.copy()
 
+        def __repr__(self):
+            return "mappingproxy({0!r})".format(self._mapping)
@@ -1,13 +1,15 @@
-import inspect
+import sys
 from .langhelpers import (
     SymbolPool,
     mergeable,
     ComfortableProperty,
-    Dispatch
+    Dispatch,
+    LRUCache
 )
-from .structure import gennil, Nil
-from .structure import Success
-from .compat import text_
+from .structure import gennil, Nil, Missing, Invalid
+from .structure import Success, RawData, make_record, make_frozen_record
+from .compat import text_, text_type
+from .translations import get_system_messages, get_display_messages, MessageStringNotFound
 from .exceptions import (
     ConstructionError,
     ValidationError,
@@ -51,6 +53,103 @@ class _OptionHandler(object):
         else:
             return on_missing(e)
 
+
+class Nested(tuple):
+    """converters of a field, which is validated by nested schema (as_converter(schema),).
+    if flatten=True, the nested schema's plan is inlined into the parent's one."""
+
+    def __new__(cls, converters, schema, plan):
+        self = tuple.__new__(cls, converters)
+        self.schema = schema
+        self.plan = plan
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, (tuple(self), self.schema, self.plan))
+
+
+def compile_fields(fields, opt_handler=_OptionHandler, flatten=False):
+    """[(name, options)] -> [(name, required, converters)]"""
+    plan = []
+    for k, options in fields:
+        converters = tuple(opt_handler.get_converters(options))
+        if flatten and len(converters) == 1:
+            schema = getattr(converters[0], "_nested_schema", None)
+            if schema is not None and hasattr(schema, "_build_rawdata"):
+                converters = Nested(converters, schema, compile_fields(schema._fields, schema._opt_handler, flatten=True))
+        plan.append((k, opt_handler.get_required(options), converters))
+    return plan
+
+
+def _run_flat(self, plan, rawdata, result, except_errors, prefix):
+    """validate with plan compiled by flatten=True. nested schemas are validated in the same pass,
+    and their errors are keyed by dotted path (same as langhelpers.flatten_dict). returns (result, failed)"""
+    failed = False
+    fail_fast = self._fail_fast
+    for k, required, converters in plan:
+        key = prefix + k
+        try:
+            val = rawdata[k]
+            if val is Nil:
+                if required:
+                    result = self.on_failure(result, key, ValidationError(dict(name="*missing", field=k, value=val))).on_failure()
+                    failed = True
+                else:
+                    result[k] = val
+            elif converters.__class__ is Nested:
+                result[k] = val
+                schema = converters.schema
+                sub_rawdata = schema._build_rawdata(val, (), schema._fields)
+                sub_result, sub_failed = _run_flat(self, converters.plan, sub_rawdata, schema._result_factory(),
+                                                   schema._except_errors, key + ".")
+                result[k] = sub_result
+                if sub_failed and not failed:
+                    result = result.on_failure()
+                    failed = True
+            else:
+                result[k] = val
+                for convert in converters:
+                    val = convert(k, val)
+                    if val.__class__ is Invalid:
+                        result = self.on_failure(result, key, val).on_failure()
+                        failed = True
+                        break
+                    if hasattr(val, "validate"):
+                        if not val.validate():
+                            result = self.on_failure(result, key, val.errors).on_failure()
+                            failed = True
+                            if fail_fast:
+                                result[k] = val.result
+                                break
+                        val = val.result
+                    result[k] = val
+                    if val is Nil:
+                        break
+        except KeyError as e:
+            if required:
+                result = self.on_failure(result, key, e).on_failure()
+                failed = True
+            else:
+                result[k] = rawdata[k]
+        except except_errors as e:
+            result = self.on_failure(result, key, e).on_failure()
+            failed = True
+        if fail_fast and self.errors:
+            break
+    return result, failed
+
+
+_profiler = None  # active profiler, set by profiling.profile() (asobibi.profiling is imported only when used)
+_instance_attributes = ("rawdata", "result", "errors", "_fields", "_configured", "_plan")
+
+
+def caller_module(depth=2):
+    """module name of the caller of schema() or validator(). so that generated classes are importable (and pickleable)"""
+    try:
+        return sys._getframe(depth).f_globals.get("__name__", "__main__")
+    except (AttributeError, ValueError):  # pragma: no cover
+        return __name__
+
 VALIDATION_ERRORS = (AssertionError, TypeError, ValueError, ValidationError)
 
 
@@ -61,14 +160,123 @@ def getitem_not_nil(D, k):
     return val
 
 
+Empty = object()
+
+
+class ErrorRecord(object):
+    """compact form of error stored in ErrorList. exception type, field and args, without traceback.
+    str() and repr() are same as the exception's, error() rebuilds it"""
+    __slots__ = ("exc_type", "field", "args")
+
+    def __init__(self, exc_type, field, args):
+        self.exc_type = exc_type
+        self.field = field
+        self.args = args
+
+    def error(self):
+        return self.exc_type(*self.args)
+
+    def __str__(self):
+        return str(self.error())
+
+    def __unicode__(self):
+        e = self.error()
+        return e.__unicode__() if hasattr(e, "__unicode__") else text_(str(e))
+
+    def __repr__(self):
+        return repr(self.error())
+
+    def __reduce__(self):
+        return (self.__class__, (self.exc_type, self.field, self.args))
+
+
+# exceptions rebuilt from args as they were. (subclasses may have other attributes)
+_recordable_types = frozenset([ValidationError, ValueError, TypeError, AssertionError, KeyError])
+_atomic_types = frozenset([str, text_type, bytes, int, float, bool, type(None), Nil.__class__])
+_records = LRUCache(maxsize=4096)  # interned records
+
+
+def as_error_record(k, e):
+    """error (exception, Invalid, or nested ErrorList) -> form stored in ErrorList"""
+    cls = e.__class__
+    if cls is Invalid:
+        exc_type, args = e.exc_type, e.args
+        if exc_type not in _recordable_types:
+            return as_error_record(k, e.error())
+    elif cls in _recordable_types:
+        exc_type, args = cls, e.args
+    else:
+        if getattr(e, "__traceback__", None) is not None:  # frames hold rawdata and locals
+            e.__traceback__ = None
+        return e
+
+    if exc_type is ValidationError and len(args) == 1 and hasattr(args[0], "items"):
+        values = sorted(args[0].items())
+    else:
+        values = enumerate(args)
+    key = [exc_type, k]
+    for name, v in values:
+        if v.__class__ not in _atomic_types:  # 1 and True are equal, but rendered differently
+            return ErrorRecord(exc_type, k, args)
+        key.extend((name, v.__class__, v))
+    key = tuple(key)
+    record = _records.get(key)
+    if record is None:
+        record = ErrorRecord(exc_type, k, args)
+        _records.set(key, record)
+    return record
+
+
+def _render_validation_error(val, messages):
+    if "fmt" in val:
+        return val["fmt"].format(**val)
+    message = messages.get(val["name"])
+    if message is None:
+        raise MessageStringNotFound(val["name"])
+    return message(val)
+
+
+def render_system_message(e, messages):
+    """same as str(e), but messages are looked up from already fetched registry"""
+    if e.__class__ is ErrorRecord:
+        if e.exc_type is ValidationError:
+            return _render_validation_error(e.args[0], messages)
+        e = e.error()
+    if e.__class__ is ValidationError:
+        return _render_validation_error(e.args[0], messages)
+    return str(e)
+
+
+def render_display_message(e, messages):
+    if e.__class__ is ErrorRecord:
+        if e.exc_type is ValidationError:
+            return _render_validation_error(e.args[0], messages)
+        e = e.error()
+    if e.__class__ is ValidationError:
+        return _render_validation_error(e.args[0], messages)
+    if hasattr(e, "__unicode__"):
+        return e.__unicode__()
+    return text_type(e)
+
+
 class ErrorList(dict):
-    def iterate_items_for_system(self):
+    def render(self, display=False, category=None):
+        """render all messages at once. -> {k: [string]} (errors of nested schema are rendered as {k: [string]}, too)"""
+        if display:
+            return dict(self.iterate_items_for_display(category))
+        return dict(self.iterate_items_for_system(category))
+
+    def iterate_items_for_system(self, category=None):
+        messages = get_system_messages(category)
         for k, vs in self.items():
-            yield k, [str(v) for v in vs]
+            yield k, [v.render(False, category) if isinstance(v, ErrorList) else render_system_message(v, messages)
+                      for v in vs]
 
-    def iterate_items_for_display(self):
+    def iterate_items_for_display(self, category=None):
+        messages = get_display_messages(category)
         for k, vs in self.items():
-            yield k, [text_(v) for v in vs]
+            yield k, [v.render(True, category) if isinstance(v, ErrorList) else render_display_message(v, messages)
+                      for v in vs]
 
     def __unicode__(self):
         return text_(dict(self.iterate_items_for_display()))
@@ -81,53 +289,126 @@ def schema(name, fields,
            base=object,
            missing=gennil,
            opt_handler=_OptionHandler,
-           except_errors=VALIDATION_ERRORS):
-
+           except_errors=VALIDATION_ERRORS,
+           compiled=False,
+           record=False,
+           fail_fast=False,
+           flatten=False,
+           module=None,
+           plan=None,
+           materialize=False,
+           debug=False):
+
+    if module is None:
+        module = caller_module()
+    options = {"base": base, "missing": missing, "opt_handler": opt_handler, "except_errors": except_errors,
+               "compiled": compiled, "record": record, "fail_fast": fail_fast, "flatten": flatten, "module": module,
+               "materialize": materialize, "debug": debug}
     field_keys = [f for f, _ in fields]
-
-    def __init__(self, _data=None, _fields=None, **data):
-        self._fields = _fields or self.__class__._fields
-        rawdata = _data.copy() if _data else {}
-        rawdata.update(data)
-        for k, options in self._fields:
+    result_factory = make_record(name + "Record", field_keys) if record else Success
+    frozen_factory = make_frozen_record(name + "Frozen", field_keys)
+    # fields conflicted with instance attributes are not materialized
+    materialized_keys = [k for k in field_keys if k not in _instance_attributes]
+    compiled = compiled or flatten or plan is not None
+    if compiled and plan is None:  # plan is passed, when it is precompiled (e.g. serialize.PlanCache)
+        plan = compile_fields(fields, opt_handler, flatten=flatten)
+    field_index = dict((k, i) for i, k in enumerate(field_keys))
+    subsets = LRUCache(maxsize=256)  # frozenset of keys -> (sub fields, sub plan)
+
+    def get_subset(keys):
+        """fields (and plan) of keys, in definition order. cached per key set"""
+        key = frozenset(keys)
+        subset = subsets.get(key)
+        if subset is None:
+            sub_fields = [fields[i] for i in sorted(field_index[k] for k in key)]
+            subset = (sub_fields, compile_fields(sub_fields, opt_handler, flatten=flatten) if compiled else None)
+            subsets.set(key, subset)
+        return subset
+
+    def get_plan(_fields):
+        subset = subsets.get(frozenset(k for k, _ in _fields))
+        if subset is not None and subset[0] is _fields:
+            return subset[1]
+        return compile_fields(_fields, opt_handler, flatten=flatten)
+
+    def build_rawdata(_data, data, _fields):
+        rawdata = RawData(_data, data)  # _data is not copied
+        for k, options in _fields:
             try:
                 rawdata[k]
             except KeyError as e:
                 rawdata[k] = opt_handler.get_default_value(options, missing, e)
-        self.rawdata = rawdata
+        return rawdata
+
+    def __init__(self, _data=None, _fields=None, **data):
+        self._fields = self.__class__._fields if _fields is None else _fields
+        self.rawdata = build_rawdata(_data, data, self._fields)
         self.result = None
         self.errors = None
         self._configured = False  # I hate this. want to remove.
+        if compiled:
+            self._plan = plan if _fields is None else get_plan(_fields)
 
     @classmethod
     def partial(cls, _data=None, **kwargs):
-        _fields = []
+        """validate only the fields passed as kwargs. (_data is not modified)"""
+        return cls(_data, get_subset(k for k in kwargs if k in field_index)[0], **kwargs)
+
+    @classmethod
+    def sparse(cls, _data=None, **kwargs):
+        """validate only the fields present in input (e.g. PATCH request)"""
+        keys = [k for k in kwargs if k in field_index]
         if _data:
-            _data.update(kwargs)
-        else:
-            _data = kwargs
-        for k, options in cls._fields:
-            if k in kwargs:
-                _fields.append((k, options))
-        return cls(_data=_data, _fields=_fields)
+            if len(_data) < len(field_index):
+                keys.extend(k for k in _data if k in field_index)
+            else:
+                keys.extend(k for k in field_keys if k in _data)
+        return cls(_data, get_subset(keys)[0], **kwargs)
+
+    @classmethod
+    def validate_many(cls, iterable, validators=(), extra=Empty):
+        """validate each record in iterable, reusing one instance (and validators) for all of them.
+        yields (index, result, errors)"""
+        instance = cls()
+        target = instance
+        for v in validators:
+            target = v(target, extra)
+        _fields = instance._fields
+        for i, data in enumerate(iterable):
+            instance.rawdata = build_rawdata(data, (), _fields)
+            instance.result = None
+            instance.errors = None
+            instance._configured = False
+            target.validate()
+            yield i, target.result, target.errors
 
     def on_failure(self, result, k, e):
         if self.errors is None:
             result = result.on_failure()
+            if materialize:
+                _dematerialize(self)
         if not self.errors:
             self.errors = ErrorList()
         if k not in self.errors:
             self.errors[k] = []
-        self.errors[k].append(e)
+        if debug:  # exceptions are kept as they are (with traceback)
+            self.errors[k].append(e.error() if e.__class__ is Invalid else e)
+        else:
+            self.errors[k].append(as_error_record(k, e))
         return result
 
     def on_validate(self, result, k, val, options):
         for validator in opt_handler.get_converters(options):
             val = validator(k, val)
+            if val.__class__ is Invalid:
+                return self.on_failure(result, k, val)
             # field is schema
             if hasattr(val, "validate"):
                 if not val.validate():
                     result = self.on_failure(result, k, val.errors)
+                    if fail_fast:
+                        result[k] = val.result
+                        break
                 val = val.result
             result[k] = val
             if val is Nil:
@@ -136,18 +417,87 @@ def schema(name, fields,
 
     def validate(self):
         if not self._configured:
-            self.result = self._validate()
+            if _profiler is None:
+                self.result = self._validate()
+            else:
+                self.result = _profiler.validate_schema(self)
             self._configured = True
+            if materialize and not self.errors:
+                _materialize(self)
+        return not self.errors
+
+    def _materialize(self):
+        # validated values are bound as instance attributes. (ComfortableProperty is non-data descriptor)
+        d = self.__dict__
+        result = self.result
+        for k in materialized_keys:
+            if k in result:
+                d[k] = result[k]
+
+    def _dematerialize(self):
+        d = self.__dict__
+        for k in materialized_keys:
+            d.pop(k, None)
+
+    def freeze(self):
+        """validated values as immutable record (slot based)"""
+        if not self.validate():
+            raise ValueError("{0!r} is not valid: {1}".format(self.__class__.__name__, self.errors))
+        result = self.result
+        return frozen_factory([(k, result[k]) for k in field_keys if k in result])
+
+    def update(self, _data=None, **data):
+        """update rawdata, and re-validate only the updated fields. returns same as validate()"""
+        if _data:
+            _data = dict(_data)
+            _data.update(data)
+            data = _data
+        self.rawdata.update(data)
+        if not self._configured:
+            return self.validate()
+        if fail_fast and self.errors:
+            # fields after the first failure were never validated, so validate all of them again
+            self.result = None
+            self.errors = None
+            self._configured = False
+            return self.validate()
+
+        result = self.result
+        errors = self.errors
+        for k, _ in self._fields:
+            if k in data:
+                result[k] = Missing(k)
+                if errors:
+                    errors.pop(k, None)
+                    if flatten:
+                        prefix = k + "."
+                        for ek in [ek for ek in errors if ek.startswith(prefix)]:
+                            del errors[ek]
+        if compiled:
+            result = self._validate(result, [p for p in self._plan if p[0] in data])
+        else:
+            result = self._validate(result, [(k, options) for k, options in self._fields if k in data])
+        if self.errors is not None and not self.errors:
+            self.errors = None
+            result = result.on_success()
+        self.result = result
+        if materialize and not self.errors:
+            _materialize(self)
         return not self.errors
 
-    def _validate(self):
-        result = Success()
-        for k, options in self._fields:
+    def _validate(self, result=None, fields=None):
+        if result is None:
+            result = result_factory()
+        for k, options in (self._fields if fields is None else fields):
             required = opt_handler.get_required(options)
             try:
                 if required:
-                    result[k] = val = getitem_not_nil(self.rawdata, k)
-                    result = self.on_validate(result, k, val, options)
+                    val = self.rawdata[k]
+                    if val is Nil:
+                        result = self.on_failure(result, k, ValidationError(dict(name="*missing", field=k, value=val)))
+                    else:
+                        result[k] = val
+                        result = self.on_validate(result, k, val, options)
                 else:
                     result[k] = val = self.rawdata[k]
                     if val is not Nil:
@@ -159,8 +509,61 @@ def schema(name, fields,
                     result[k] = self.rawdata[k]
             except except_errors as e:
                 result = self.on_failure(result, k, e)
+            if fail_fast and self.errors:
+                break
+        return result
+
+    def avalidate(self):
+        """coroutine version of validate(). converters may return awaitables"""
+        from .aio import avalidate_schema
+        return avalidate_schema(self)
+
+    def _compiled_validate(self, result=None, plan=None):
+        # same as _validate, but options are already resolved into self._plan
+        if result is None:
+            result = result_factory()
+        rawdata = self.rawdata
+        for k, required, converters in (self._plan if plan is None else plan):
+            try:
+                val = rawdata[k]
+                if val is Nil:
+                    if required:
+                        result = self.on_failure(result, k, ValidationError(dict(name="*missing", field=k, value=val)))
+                    else:
+                        result[k] = val
+                else:
+                    result[k] = val
+                    for convert in converters:
+                        val = convert(k, val)
+                        if val.__class__ is Invalid:
+                            result = self.on_failure(result, k, val)
+                            break
+                        if hasattr(val, "validate"):
+                            if not val.validate():
+                                result = self.on_failure(result, k, val.errors)
+                                if fail_fast:
+                                    result[k] = val.result
+                                    break
+                            val = val.result
+                        result[k] = val
+                        if val is Nil:
+                            break
+            except KeyError as e:
+                if required:
+                    result = self.on_failure(result, k, e)
+                else:
+                    result[k] = rawdata[k]
+            except except_errors as e:
+                result = self.on_failure(result, k, e)
+            if fail_fast and self.errors:
+                break
         return result
 
+    def _flat_validate(self, result=None, plan=None):
+        if result is None:
+            result = result_factory()
+        return _run_flat(self, self._plan if plan is None else plan, self.rawdata, result, except_errors, "")[0]
+
     def get_data(self):
         if self.result is None:
             return self.rawdata
@@ -182,18 +585,35 @@ def schema(name, fields,
         for f in self.field_keys:
             yield data[f]
 
-    attrs = {"__iter__": __iter__,
+    attrs = {"__module__": module,
+             "__iter__": __iter__,
              "rawdata_iter": rawdata_iter,
              "result_iter": result_iter,
              "__init__": __init__,
              "partial": partial,
+             "sparse": sparse,
+             "_field_index": field_index,
+             "validate_many": validate_many,
+             "update": update,
              "get_data": get_data,
              "_fields": fields,
              "field_keys": field_keys,
              "on_validate": on_validate,
              "on_failure": on_failure,
-             "_validate": _validate,
-             "validate": validate}
+             "_validate": _flat_validate if flatten else (_compiled_validate if compiled else _validate),
+             "_compiled_validate": _compiled_validate,
+             "_build_rawdata": staticmethod(build_rawdata),
+             "_plan": plan,
+             "_options": options,
+             "_opt_handler": opt_handler,
+             "_missing": staticmethod(missing),
+             "_result_factory": result_factory,
+             "_fail_fast": fail_fast,
+             "_except_errors": except_errors,
+             "validate": validate,
+             "_materialize": _materialize if materialize else None,
+             "freeze": freeze,
+             "avalidate": avalidate}
 
     def access_property(self, k):
         return self.get_data()[k]
@@ -203,7 +623,6 @@ def schema(name, fields,
 
 
 WithExtra = Dispatch("extra")
-Empty = object()
 
 
 def default_apply_dispatch(fn, ks, result, extra_ks, extra):
@@ -232,7 +651,8 @@ def normalize(fields, validate_fn):
     if WithExtra.is_tagged(validate_fn):
         spec = WithExtra.argspec(validate_fn)
     else:
-        spec = inspect.getargspec(validate_fn)
+        from inspect import getargspec  # inspect is heavy, imported on first use
+        spec = getargspec(validate_fn)
 
     extra_fields = ()
     arity_from_schema_fields = len(fields) + 1
@@ -250,13 +670,23 @@ def normalize(fields, validate_fn):
 def validator(name, _converters,
               base=object,
               apply_dispatch=default_apply_dispatch,
-              except_errors=VALIDATION_ERRORS):
+              except_errors=VALIDATION_ERRORS,
+              fail_fast=False,
+              module=None):
+
+    if module is None:
+        module = caller_module()
 
     converters = [normalize(fields, validate_fn) for fields, validate_fn in _converters]
+    dependencies = {}  # field name -> indices of converters
+    for i, (fields, _, _, _) in enumerate(converters):
+        for k in fields:
+            dependencies.setdefault(k, []).append(i)
 
     def __init__(self, schema, extra=Empty, setup_check=True):
         self.schema = schema
         self.extra = extra
+        self._issued = {}  # index of converters -> error
         if setup_check:
             self.setup_check()
 
@@ -270,20 +700,74 @@ def validator(name, _converters,
 
     def validate(self):
         nested_status = self.schema.validate()
-        status = self._validate()
+        if fail_fast and not nested_status:
+            return False
+        if _profiler is None:
+            status = self._validate()
+        else:
+            status = _profiler.validate_checks(self)
         return nested_status and status
 
-    def _validate(self):
+    def update(self, _data=None, **data):
+        """update rawdata, and re-run only the checks depending on the updated fields"""
+        if _data:
+            _data = dict(_data)
+            _data.update(data)
+            data = _data
+        if self.result is None:
+            nested_status = self.schema.update(data)
+            status = self._validate()
+            return nested_status and status
+
+        # with fail_fast, checks may have been skipped after the first failure, so all of them are run again
+        rerun_all = fail_fast or getattr(self.schema, "_fail_fast", False)
+        if rerun_all:
+            targets = list(range(len(converters)))
+        else:
+            targets = sorted(set(i for k in data for i in dependencies.get(k, ())))
+        errors = self.errors
+        for i in targets:
+            e = self._issued.pop(i, None)
+            if e is not None and errors:
+                k = converters[i][0][0]
+                vs = list(errors.get(k, ()))
+                for j, v in enumerate(vs):
+                    if v is e:  # records may be interned, so only one of them is removed
+                        del vs[j]
+                        break
+                if vs:
+                    errors[k] = vs
+                else:
+                    errors.pop(k, None)
+        nested_status = self.schema.update(data)
+        if rerun_all:
+            if fail_fast and not nested_status:
+                return False
+            return self._validate()
+        return self._validate([(i, converters[i]) for i in targets])
+
+    def _validate(self, targets=None):
         result = self.result
-        for fields, extra_fields, validator, _ in converters:
+        for i, (fields, extra_fields, validator, _) in (enumerate(converters) if targets is None else targets):
             if all(result.get(k, Nil) != Nil for k in fields):
                 try:
-                    apply_dispatch(validator, fields, result, extra_fields, self.extra)
+                    r = apply_dispatch(validator, fields, result, extra_fields, self.extra)
+                    error = r if r.__class__ is Invalid else None
                 except except_errors as e:
-                    result = self.on_failure(result, fields[0], e)
+                    error = e
+                if error is not None:
+                    result = self.on_failure(result, fields[0], error)
+                    self._issued[i] = self.errors[fields[0]][-1]
+                    if fail_fast:
+                        break
         self.result = result
         return self.schema.errors is None
 
+    def avalidate(self):
+        """coroutine version of validate(). independent checks run concurrently"""
+        from .aio import avalidate_validator
+        return avalidate_validator(self)
+
     @property
     def result(self):
         return self.schema.result
@@ -301,11 +785,18 @@ def validator(name, _converters,
 
     return type(name,
                 (base,),
-                {"__init__": __init__,
+                {"__module__": module,
+                 "__init__": __init__,
                  "setup_check": setup_check,
                  "_converters": converters,
+                 "_dependencies": dependencies,
+                 "_apply_dispatch": staticmethod(apply_dispatch),
+                 "_except_errors": except_errors,
+                 "_fail_fast": fail_fast,
                  "validate": validate,
                  "_validate": _validate,
+                 "update": update,
+                 "avalidate": avalidate,
                  "result": result,
                  "errors": errors,
                  "on_failure": on_failure})
@@ -1,13 +1,26 @@
 from functools import wraps
 from .exceptions import ValidationError
 from .compat import text_, bytes_
+from .construct import VALIDATION_ERRORS, ErrorList, Empty
+from .langhelpers import LRUCache, LazyPattern
+from .structure import Invalid
+
+_miss = object()
+# strings not matched are surely rejected by int()/float(), so they are Invalid without raising
+_int_rx = LazyPattern(r"^[\s\d_+-]+$")
+_float_rx = LazyPattern(r"(?i)^[\s\d_.eE+-]+$|^\s*[+-]?(?:inf|infinity|nan)\s*$")
+_isdecimal = getattr(str, "isdecimal", str.isdigit)
 
 
 def Int(k, val):
+    if val.__class__ is str and not _isdecimal(val) and _int_rx.match(val) is None:
+        return Invalid(ValueError, "invalid literal for int() with base 10: {0}".format(repr(val)[:200]))
     return int(val)
 
 
 def Float(k, val):
+    if val.__class__ is str and _float_rx.match(val) is None:
+        return Invalid(ValueError, "could not convert string to float: {0!r}".format(val))
     return float(val)
 
 
@@ -23,22 +36,125 @@ def as_converter(schema):
     @wraps(schema)
     def converter(k, *args, **kwargs):
         return schema(*args, **kwargs)
+    converter._nested_schema = schema
+    return converter
+
+
+class SequenceValidation(object):
+    """validate every element by schema (in batch, via schema.validate_many).
+    returned by the converter of as_sequence(), and handled as nested schema."""
+
+    def __init__(self, schema, values, max_errors=None, validators=(), extra=Empty):
+        self.schema = schema
+        self.values = values
+        self.max_errors = max_errors
+        self.validators = validators
+        self.extra = extra
+        self.result = None
+        self.errors = None
+
+    def validate(self):
+        result = []
+        errors = None
+        for i, r, e in self.schema.validate_many(self.values, validators=self.validators, extra=self.extra):
+            result.append(r)
+            if e:
+                if errors is None:
+                    errors = ErrorList()
+                errors[i] = [e]
+                if self.max_errors is not None and len(errors) >= self.max_errors:
+                    result.extend(self.values[len(result):])
+                    break
+        self.result = result
+        self.errors = errors
+        return errors is None
+
+
+def as_sequence(schema, max_errors=None, validators=(), extra=Empty):
+    """converter for list of schema. errors are keyed by index.
+    if max_errors is given, stop after max_errors elements are failed."""
+    def converter(k, values):
+        if not isinstance(values, (list, tuple)):
+            raise ValidationError(dict(fmt="{field} is not a sequence", field=k, value=values))
+        return SequenceValidation(schema, values, max_errors=max_errors, validators=validators, extra=extra)
+    converter.__name__ = "as_sequence({0})".format(schema.__name__)
     return converter
 
 
 def as_validation(fn):
     @wraps(fn)
     def validate(k, x):
-        fn(k, x)
+        r = fn(k, x)
+        if r.__class__ is Invalid:
+            return r
         return x
     return validate
 
 
-def validation_from_condition(cond, fmt="condition: {condition}({value!r}) is {result}"):
+def validation_from_condition(cond, fmt="condition: {condition}({value!r}) is {result}", vectorized=None):
+    """vectorized is a version of cond for numpy arrays (array -> bool array), used by asobibi.columnar.
+    if True, cond itself is used."""
     @wraps(cond)
     def validate(k, value):
         result = cond(value)
         if not result:
-            raise ValidationError(dict(fmt=fmt, field=k, result=result, value=value, condition=cond.__name__))
+            return Invalid(ValidationError, dict(fmt=fmt, field=k, result=result, value=value, condition=cond.__name__))
         return value
+    if vectorized is not None:
+        validate._vectorized_condition = (cond if vectorized is True else vectorized, fmt)
     return validate
+
+
+def as_returning(fn, except_errors=VALIDATION_ERRORS):
+    """adapter. converter raising errors -> converter returning Invalid"""
+    @wraps(fn)
+    def converter(k, value):
+        try:
+            return fn(k, value)
+        except except_errors as e:
+            return Invalid.from_error(e)
+    return converter
+
+
+def as_raising(fn):
+    """adapter. converter returning Invalid -> converter raising errors (for calling converters directly)"""
+    @wraps(fn)
+    def converter(k, value):
+        v = fn(k, value)
+        if v.__class__ is Invalid:
+            raise v.error()
+        return v
+    return converter
+
+
+def pure(fn=None, maxsize=1024, except_errors=VALIDATION_ERRORS):
+    """mark converter as pure. results (and errors) are cached by (k, value), in bounded LRU.
+    cached errors are re-raised as copies, so ErrorList output doesn't change."""
+    if fn is None:
+        return lambda fn: pure(fn, maxsize=maxsize, except_errors=except_errors)
+    cache = LRUCache(maxsize)
+
+    @wraps(fn)
+    def converter(k, value):
+        key = (k, value.__class__, value)
+        try:
+            hit = cache.get(key, _miss)
+        except TypeError:  # unhashable
+            return fn(k, value)
+        if hit is _miss:
+            try:
+                v = fn(k, value)
+            except except_errors as e:
+                from copy import copy
+                cache.set(key, (False, copy(e)))
+                raise
+            cache.set(key, (True, v))
+            return v
+        ok, v = hit
+        if ok:
+            return v
+        from copy import copy
+        raise copy(v)
+    converter.cache_info = cache.info
+    converter.cache_clear = cache.clear
+    return converter
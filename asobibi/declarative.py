@@ -28,15 +28,28 @@ def column(fn, **options):
 
 def as_schema(missing=gennil,
               opt_handler=_OptionHandler,
-              except_errors=VALIDATION_ERRORS):
+              except_errors=VALIDATION_ERRORS,
+              compiled=False,
+              record=False,
+              fail_fast=False,
+              flatten=False,
+              materialize=False,
+              debug=False):
     def wrapper(cls):
         xs = []
         for name, f in cls.__dict__.items():
             if hasattr(f, "_column_count"):
                 xs.append((f._column_count, f(name)))
         fields = [v for _, v in sorted(xs, key=lambda x: x[0])]
-        return schema(name, fields, cls.__mro__[0],
+        return schema(cls.__name__, fields, cls.__mro__[0],
                       missing=missing,
                       opt_handler=opt_handler,
-                      except_errors=except_errors)
+                      except_errors=except_errors,
+                      compiled=compiled,
+                      record=record,
+                      fail_fast=fail_fast,
+                      flatten=flatten,
+                      materialize=materialize,
+                      debug=debug,
+                      module=cls.__module__)
     return wrapper
@@ -1,6 +1,6 @@
 import sys
-import inspect
 import functools
+from collections import OrderedDict, namedtuple
 
 
 def warning(message):
@@ -44,8 +44,9 @@ class Dispatch(object):
         @functools.wraps(fn)
         def wrapped(*args, **kwargs):
             return fn(*args, **kwargs)
+        from inspect import getargspec  # inspect is heavy, imported on first use
         setattr(wrapped, self._tag_attr, self.tag)
-        setattr(wrapped, self.__class__.ARGSPEC, inspect.getargspec(fn))
+        setattr(wrapped, self.__class__.ARGSPEC, getargspec(fn))
         return wrapped
 
     def is_tagged(self, fn):
@@ -55,6 +56,59 @@ class Dispatch(object):
         return getattr(fn, self.__class__.ARGSPEC)
 
 
+class LazyPattern(object):
+    """regular expression compiled on first use (importing re is deferred).
+    attributes of the compiled pattern (match, search, ...) are cached on first access"""
+
+    def __init__(self, pattern, flags=0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __getattr__(self, k):
+        import re
+        v = getattr(re.compile(self.pattern, self.flags), k)
+        setattr(self, k, v)
+        return v
+
+
+CacheInfo = namedtuple("CacheInfo", "hits misses maxsize currsize")
+
+
+class LRUCache(object):
+
+    """ bounded mapping. least recently used entry is evicted first"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, k, default=None):
+        data = self.data
+        try:
+            v = data.pop(k)
+        except KeyError:
+            self.misses += 1
+            return default
+        data[k] = v
+        self.hits += 1
+        return v
+
+    def set(self, k, v):
+        data = self.data
+        data[k] = v
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self.data))
+
+    def clear(self):
+        self.data.clear()
+        self.hits = self.misses = 0
+
+
 def merged(d1, d2):
     for k, v in d2.items():
         if k not in d1:
@@ -123,4 +177,28 @@ def _flatten_dict(val, delimiter, result, ks):
             _flatten_dict(val[k], delimiter, result, ks)
             ks.pop()
     else:
-        result[delimiter.join(ks)] = val
+        result[delimiter.join(str(k) for k in ks)] = val
+
+
+def import_symbol(ref):
+    """'pkg.module:Name' or 'pkg.module.Name' -> object"""
+    if ":" in ref:
+        module_name, attrs = ref.split(":", 1)
+    else:
+        module_name, attrs = ref.rsplit(".", 1)
+    from importlib import import_module
+    obj = import_module(module_name)
+    for k in attrs.split("."):
+        obj = getattr(obj, k)
+    return obj
+
+
+def symbol_reference(obj):
+    """object -> 'pkg.module:Name'. if not importable, raises ValueError"""
+    ref = "{0}:{1}".format(obj.__module__, getattr(obj, "__qualname__", obj.__name__))
+    try:
+        if import_symbol(ref) is obj:
+            return ref
+    except (ImportError, AttributeError):
+        pass
+    raise ValueError("{0!r} is not importable as {1}".format(obj, ref))
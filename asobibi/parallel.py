@@ -0,0 +1,86 @@
+# -*- coding:utf-8 -*-
+from collections import deque
+from itertools import islice
+from .compat import string_types
+from .construct import Empty
+from .exceptions import ConstructionError
+from .langhelpers import import_symbol, symbol_reference
+
+_resolved = {}
+
+
+def as_reference(schema):
+    """schema class or 'pkg.module:Name' -> 'pkg.module:Name'.
+    schemas which are not importable are sent by definition (see serialize.definition())"""
+    if isinstance(schema, string_types):
+        return schema
+    try:
+        return symbol_reference(schema)
+    except ValueError as e:
+        if hasattr(schema, "_options"):
+            from .serialize import definition
+            return definition(schema)
+        raise ConstructionError("{0}. define it at module level with the same name, or pass 'pkg.module:Name'".format(e))
+
+
+def resolve(ref):
+    if hasattr(ref, "get"):  # definition
+        from .serialize import load
+        return load(ref)
+    try:
+        return _resolved[ref]
+    except KeyError:
+        v = _resolved[ref] = import_symbol(ref)
+        return v
+
+
+def validate_chunk(schema_ref, validator_refs, extra, start, records):
+    """runs in worker process. returns [(index, result, errors)]"""
+    schema = resolve(schema_ref)
+    validators = [resolve(ref) for ref in validator_refs]
+    return [(start + i, result, errors)
+            for i, result, errors in schema.validate_many(records, validators=validators, extra=extra)]
+
+
+def iterate_chunks(iterable, chunksize):
+    it = iter(iterable)
+    start = 0
+    while True:
+        chunk = list(islice(it, chunksize))
+        if not chunk:
+            return
+        yield start, chunk
+        start += len(chunk)
+
+
+def validate_parallel(schema, records, validators=(), extra=Empty,
+                      chunksize=1000, max_workers=None, executor=None):
+    """validate records with process pool. yields (index, result, errors) in input order.
+
+    schema and validators are sent to workers by importable name ('pkg.module:Name'),
+    so validators must be defined at module level. schemas which are not importable are sent by definition.
+    """
+    schema_ref = as_reference(schema)
+    validator_refs = [as_reference(v) for v in validators]
+    if executor is None:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for row in _submit_all(executor, schema_ref, validator_refs, extra, records, chunksize, max_workers):
+                yield row
+    else:
+        for row in _submit_all(executor, schema_ref, validator_refs, extra, records, chunksize, max_workers):
+            yield row
+
+
+def _submit_all(executor, schema_ref, validator_refs, extra, records, chunksize, max_workers):
+    # only a bounded number of chunks are in flight, so memory doesn't grow with the input
+    window = (max_workers or 4) * 2
+    pending = deque()
+    for start, chunk in iterate_chunks(records, chunksize):
+        pending.append(executor.submit(validate_chunk, schema_ref, validator_refs, extra, start, chunk))
+        if len(pending) >= window:
+            for row in pending.popleft().result():
+                yield row
+    while pending:
+        for row in pending.popleft().result():
+            yield row
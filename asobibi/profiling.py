@@ -0,0 +1,135 @@
+# -*- coding:utf-8 -*-
+"""per field / per converter profiling.
+
+    with profiling.profile() as profiler:
+        Submit(data).validate()
+    print(profiler.table())
+
+while not profiling, the cost is one global lookup per validate().
+"""
+import time
+from functools import wraps
+from contextlib import contextmanager
+from collections import OrderedDict
+from .structure import Invalid
+from . import construct
+
+current = None  # active profiler
+timer = getattr(time, "perf_counter", time.time)
+
+
+class Stat(object):
+    __slots__ = ("calls", "failures", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return "<Stat calls={0} failures={1} seconds={2:.6f}>".format(self.calls, self.failures, self.seconds)
+
+
+def _name_of(fn):
+    return getattr(fn, "__name__", None) or repr(fn)
+
+
+class Profiler(object):
+    def __init__(self):
+        self.stats = OrderedDict()  # (schema, field, converter) -> Stat
+        self._instrumented = {}
+
+    def wrap(self, schema_name, field, fn):
+        key = (schema_name, field, _name_of(fn))
+        stat = self.stats.get(key)
+        if stat is None:
+            stat = self.stats[key] = Stat()
+
+        @wraps(fn)
+        def wrapped(*args, **kwargs):
+            t = timer()
+            try:
+                r = fn(*args, **kwargs)
+                if r.__class__ is Invalid:
+                    stat.failures += 1
+                return r
+            except Exception:
+                stat.failures += 1
+                raise
+            finally:
+                stat.calls += 1
+                stat.seconds += timer() - t
+        return wrapped
+
+    def validate_schema(self, schema):
+        """schema._validate() with instrumented converters"""
+        cls = schema.__class__
+        plan = getattr(schema, "_plan", None)
+        if plan is not None:
+            key = (cls, "plan", tuple(p[0] for p in plan))
+            instrumented = self._instrumented.get(key)
+            if instrumented is None:
+                instrumented = self._instrumented[key] = self._instrument_plan(cls.__name__, plan)
+            return schema._validate(plan=instrumented)
+
+        # not compiled. compile fields here (options are resolved by the schema's opt_handler), and instrument the plan
+        key = (cls, "fields", tuple(k for k, _ in schema._fields))
+        instrumented = self._instrumented.get(key)
+        if instrumented is None:
+            plan = construct.compile_fields(schema._fields, schema._opt_handler)
+            instrumented = self._instrumented[key] = self._instrument_plan(cls.__name__, plan)
+        return schema._compiled_validate(plan=instrumented)
+
+    def _instrument_plan(self, schema_name, plan):
+        instrumented = []
+        for k, required, converters in plan:
+            wrapped = tuple(self.wrap(schema_name, k, fn) for fn in converters)
+            nested_plan = getattr(converters, "plan", None)
+            if nested_plan is not None:  # Nested (flatten=True). keep it, and instrument the inlined plan
+                schema = converters.schema
+                wrapped = converters.__class__(wrapped, schema, self._instrument_plan(schema.__name__, nested_plan))
+            instrumented.append((k, required, wrapped))
+        return instrumented
+
+    def validate_checks(self, validator):
+        """validator._validate() with instrumented (fields, validator) pairs"""
+        cls = validator.__class__
+        key = (cls, "converters")
+        targets = self._instrumented.get(key)
+        if targets is None:
+            targets = self._instrumented[key] = [
+                (i, (fields, extra_fields, self.wrap(cls.__name__, ",".join(fields), fn), spec))
+                for i, (fields, extra_fields, fn, spec) in enumerate(validator._converters)]
+        return validator._validate(targets)
+
+    def rows(self):
+        """[(schema, field, converter, stat)], slowest first"""
+        rows = [(schema, field, converter, stat) for (schema, field, converter), stat in self.stats.items()]
+        rows.sort(key=lambda row: row[3].seconds, reverse=True)
+        return rows
+
+    def table(self):
+        header = ("schema", "field", "converter", "calls", "failures", "total(ms)", "per call(us)")
+        lines = [header]
+        for schema, field, converter, stat in self.rows():
+            per_call = stat.seconds / stat.calls * 1e6 if stat.calls else 0.0
+            lines.append((schema, field, converter, str(stat.calls), str(stat.failures),
+                          "{0:.3f}".format(stat.seconds * 1e3), "{0:.3f}".format(per_call)))
+        widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+        return "\n".join("  ".join(col.ljust(w) for col, w in zip(line, widths)).rstrip() for line in lines)
+
+    def clear(self):
+        self.stats.clear()
+        self._instrumented.clear()  # wrapped converters hold the cleared stats
+
+
+@contextmanager
+def profile(profiler=None):
+    """enable profiling in this block. (process wide)"""
+    global current
+    prev = current
+    current = construct._profiler = profiler or Profiler()
+    try:
+        yield current
+    finally:
+        current = construct._profiler = prev
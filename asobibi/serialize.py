@@ -0,0 +1,207 @@
+# -*- coding:utf-8 -*-
+"""schema definition. fields and options, converters are referenced by import path ('pkg.module:name').
+
+    d = definition(Schema)  # json serializable
+    Schema = build(d)
+    pickle.dumps(pickleable(Schema))  # unpickled as the schema class (built from definition)
+
+definitions are keyed by fingerprint(d), and compiled plans can be stored on disk with PlanCache,
+so worker processes load prebuilt plans instead of compiling them again.
+
+converters must be importable (defined at module level). nested schemas (as_converter(schema))
+are inlined into the definition, and pickled by definition in cached plans.
+"""
+import io
+import os
+import json
+import pickle
+import hashlib
+import tempfile
+from .construct import schema, compile_fields, Nested
+from .converters import as_converter
+from .exceptions import ConstructionError
+from .langhelpers import import_symbol, symbol_reference, warning
+
+FORMAT = 1  # version of definition and plan format
+_built = {}  # fingerprint -> schema
+
+
+def _reference(obj):
+    try:
+        return symbol_reference(obj)
+    except ValueError as e:
+        raise ConstructionError("{0}. only importable objects can be serialized".format(e))
+
+
+def _base_definition(schema, base):
+    # as_schema() replaces the decorated class (the base) with the schema in its module,
+    # so the base itself is not importable. its own bases are used instead
+    while base is not object and issubclass(schema, base) and \
+            (base.__module__, base.__name__) == (schema.__module__, schema.__name__):
+        base = base.__bases__[0]
+    return None if base is object else _reference(base)
+
+
+def _converter_definition(convert):
+    nested = getattr(convert, "_nested_schema", None)
+    if nested is not None and hasattr(nested, "_options"):
+        return {"schema": definition(nested)}
+    return _reference(convert)
+
+
+def _load_converter(d):
+    if hasattr(d, "get"):
+        return as_converter(load(d["schema"]))
+    return import_symbol(d)
+
+
+def definition(schema):
+    """schema class -> definition (json serializable dict)"""
+    options = schema._options
+    fields = []
+    for k, field_options in schema._fields:
+        d = {}
+        for name, v in field_options.items():
+            d[name] = [_converter_definition(convert) for convert in v] if name == "converters" else v
+        fields.append([k, d])
+    return {"format": FORMAT,
+            "name": schema.__name__,
+            "fields": fields,
+            "options": {"base": _base_definition(schema, options["base"]),
+                        "missing": _reference(options["missing"]),
+                        "opt_handler": _reference(options["opt_handler"]),
+                        "except_errors": [_reference(e) for e in options["except_errors"]],
+                        "compiled": options["compiled"],
+                        "record": options["record"],
+                        "fail_fast": options["fail_fast"],
+                        "flatten": options["flatten"],
+                        "materialize": options["materialize"],
+                        "debug": options["debug"],
+                        "module": options["module"]}}
+
+
+def fingerprint(d):
+    """hash of definition"""
+    try:
+        data = json.dumps(d, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError) as e:
+        raise ConstructionError("definition is not serializable: {0}".format(e))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def build(d, cache=None):
+    """definition -> schema class. if cache (PlanCache) is passed, compiled plan is loaded from it"""
+    if d.get("format") != FORMAT:
+        raise ConstructionError("unsupported definition format: {0}".format(d.get("format")))
+    options = d["options"]
+    fields = []
+    for k, field_options in d["fields"]:
+        field_options = field_options.copy()
+        if "converters" in field_options:
+            field_options["converters"] = [_load_converter(x) for x in field_options["converters"]]
+        fields.append((k, field_options))
+    opt_handler = import_symbol(options["opt_handler"])
+
+    plan = None
+    if cache is not None and (options["compiled"] or options["flatten"]):
+        key = fingerprint(d)
+        plan = cache.get(key)
+        if plan is None:
+            plan = compile_fields(fields, opt_handler, flatten=options["flatten"])
+            if not cache.set(key, plan):
+                warning("compiled plan of {0} is not cached (not pickleable)".format(d["name"]))
+
+    return schema(str(d["name"]), fields,
+                  base=object if options["base"] is None else import_symbol(options["base"]),
+                  missing=import_symbol(options["missing"]),
+                  opt_handler=opt_handler,
+                  except_errors=tuple(import_symbol(e) for e in options["except_errors"]),
+                  compiled=options["compiled"],
+                  record=options["record"],
+                  fail_fast=options["fail_fast"],
+                  flatten=options["flatten"],
+                  materialize=options.get("materialize", False),
+                  debug=options.get("debug", False),
+                  module=options["module"],
+                  plan=plan)
+
+
+def load(d, cache=None):
+    """same as build(), but built schemas are reused in this process (keyed by fingerprint)"""
+    key = fingerprint(d)
+    try:
+        return _built[key]
+    except KeyError:
+        v = _built[key] = build(d, cache=cache)
+        return v
+
+
+class SchemaDefinition(object):
+    """pickleable form of schema. unpickled as schema class"""
+
+    def __init__(self, definition):
+        self.definition = definition
+
+    def __reduce__(self):
+        return (load, (self.definition,))
+
+
+def pickleable(schema):
+    return SchemaDefinition(definition(schema))
+
+
+class _PlanPickler(pickle.Pickler):
+    """nested schemas are pickled by definition (the class is rebuilt by load(), not imported)"""
+
+    def persistent_id(self, obj):
+        if obj.__class__ is Nested:
+            return ("nested", definition(obj.schema), obj.plan)
+        return None
+
+
+class _PlanUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        if pid[0] != "nested":
+            raise pickle.UnpicklingError("unsupported persistent id: {0!r}".format(pid[0]))
+        _, d, plan = pid
+        nested = load(d)
+        return Nested((as_converter(nested),), nested, plan)
+
+
+class PlanCache(object):
+    """compiled plans on disk, <directory>/<fingerprint>-<FORMAT>.plan (pickle).
+    plans having unpickleable converters (e.g. closures) are not stored.
+    pickle is loaded, so use the directory writable only by trusted users."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def path(self, key):
+        return os.path.join(self.directory, "{0}-{1}.plan".format(key, FORMAT))
+
+    def get(self, key):
+        try:
+            with open(self.path(key), "rb") as rf:
+                return _PlanUnpickler(rf).load()
+        except (IOError, OSError, EOFError, ImportError, AttributeError, pickle.UnpicklingError, ConstructionError):
+            return None
+
+    def set(self, key, plan):
+        """returns False if plan is not pickleable"""
+        buf = io.BytesIO()
+        try:
+            _PlanPickler(buf, pickle.HIGHEST_PROTOCOL).dump(plan)
+        except (pickle.PicklingError, TypeError, AttributeError, ConstructionError):
+            return False
+        data = buf.getvalue()
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as wf:
+                wf.write(data)
+            getattr(os, "replace", os.rename)(tmp, self.path(key))
+        except Exception:
+            os.remove(tmp)
+            raise
+        return True
@@ -0,0 +1,49 @@
+# -*- coding:utf-8 -*-
+import csv
+import json
+from .construct import Empty
+
+
+def csv_records(fp, fieldnames=None, **kwargs):
+    """rows of csv file -> dict. if fieldnames is None, the first row is used as header"""
+    reader = csv.reader(fp, **kwargs)
+    if fieldnames is None:
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return
+    for row in reader:
+        if row:
+            yield dict(zip(fieldnames, row))
+
+
+def jsonlines_records(fp):
+    """lines of json lines file -> dict. blank lines are skipped"""
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+
+def validate_stream(schema, records, validators=(), extra=Empty):
+    """yields (index, result, errors) lazily. records are never held in memory"""
+    return schema.validate_many(records, validators=validators, extra=extra)
+
+
+def iterate_valid(schema, records, on_error=None, validators=(), extra=Empty):
+    """yields valid results only. invalid ones are passed to on_error(index, result, errors)"""
+    for i, result, errors in schema.validate_many(records, validators=validators, extra=extra):
+        if errors:
+            if on_error is not None:
+                on_error(i, result, errors)
+        else:
+            yield result
+
+
+def validate_csv(fp, schema, validators=(), extra=Empty, on_error=None, fieldnames=None, **kwargs):
+    return iterate_valid(schema, csv_records(fp, fieldnames=fieldnames, **kwargs),
+                         on_error=on_error, validators=validators, extra=extra)
+
+
+def validate_jsonlines(fp, schema, validators=(), extra=Empty, on_error=None):
+    return iterate_valid(schema, jsonlines_records(fp),
+                         on_error=on_error, validators=validators, extra=extra)
@@ -1,7 +1,14 @@
+from keyword import iskeyword
 from collections import OrderedDict
 from collections import Mapping
+try:
+    from collections.abc import MutableMapping
+except ImportError:  # pragma: no cover
+    from collections import MutableMapping
+from .langhelpers import LazyPattern
 
 _dummy = object()
+_identifier_rx = LazyPattern(r"^[A-Za-z_][A-Za-z0-9_]*$")
 
 
 class ChainMapView(Mapping):
@@ -38,6 +45,89 @@ class ChainMapView(Mapping):
         return self.size
 
 
+class RawData(MutableMapping):
+    """copy on write view of input data. kwargs, defaults and written values are held in data,
+    and other keys are looked up from base (the caller's data, which is not copied).
+    base is copied only when a key is deleted.
+
+    not a dict subclass, so dict(rawdata), {}.update(rawdata) and f(**rawdata) see keys of base, too."""
+    __slots__ = ("base", "data")
+
+    def __init__(self, base=None, data=()):
+        self.data = dict(data)
+        self.base = base or None
+
+    def __getitem__(self, k):
+        try:
+            return self.data[k]
+        except KeyError:
+            if self.base is None:
+                raise
+        v = self.data[k] = self.base[k]
+        return v
+
+    def __setitem__(self, k, v):
+        self.data[k] = v
+
+    def __delitem__(self, k):
+        del self.materialize().data[k]
+
+    def __contains__(self, k):
+        return k in self.data or (self.base is not None and k in self.base)
+
+    def get(self, k, default=None):
+        try:
+            return self[k]
+        except KeyError:
+            return default
+
+    def __iter__(self):
+        # same order as copying base and updating it
+        base = self.base
+        if base is not None:
+            for k in base:
+                yield k
+        for k in self.data:
+            if base is None or k not in base:
+                yield k
+
+    def __len__(self):
+        base = self.base
+        if base is None:
+            return len(self.data)
+        return len(base) + sum(1 for k in self.data if k not in base)
+
+    def __eq__(self, other):
+        return self.copy() == other
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(self.copy())
+
+    def copy(self):
+        return dict((k, self[k]) for k in self)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+    def materialize(self):
+        if self.base is not None:
+            self.data = self.copy()
+            self.base = None
+        return self
+
+    def update(self, *args, **kwargs):
+        self.data.update(*args, **kwargs)
+
+    def clear(self):
+        self.base = None
+        self.data.clear()
+
+
 class GentleDictMixin(object):
     def __repr__(self):
         return "<%r: %r>" % (self.__class__.__name__, self.items())
@@ -76,13 +166,196 @@ class Failure(GentleDictMixin, OrderedDict):
     def on_failure(self):
         return self
 
+    def on_success(self):
+        # status is changed in place, instead of copying. (same layout as Success)
+        self.__class__ = Success
+        return self
+
 
 class Success(GentleDictMixin, OrderedDict):
     def on_failure(self):
-        result = Failure()
-        for k in self:
-            result[k] = self[k]
-        return result
+        self.__class__ = Failure
+        return self
+
+    def on_success(self):
+        return self
+
+
+class Record(Mapping):
+    """compact result. values are held in a list ordered by _keys, instead of hash table"""
+    __slots__ = ("_values", "_ok")
+    _keys = ()
+    _index = {}
+
+    def __init__(self):
+        self._values = [_dummy] * len(self._keys)
+        self._ok = True
+
+    def __nonzero__(self):
+        return self._ok
+
+    def __bool__(self):
+        return self._ok
+
+    def __getitem__(self, k):
+        try:
+            i = self._index[k]
+        except KeyError:
+            if self._ok:
+                raise
+            return Missing(k)
+        v = self._values[i]
+        if v is _dummy:
+            if self._ok:
+                raise KeyError(k)
+            v = self._values[i] = Missing(k)
+        return v
+
+    def __setitem__(self, k, v):
+        self._values[self._index[k]] = v
+
+    def __contains__(self, k):
+        i = self._index.get(k)
+        return i is not None and self._values[i] is not _dummy
+
+    def get(self, k, default=None):
+        i = self._index.get(k)
+        if i is None:
+            return default
+        v = self._values[i]
+        return default if v is _dummy else v
+
+    def __iter__(self):
+        for k, v in zip(self._keys, self._values):
+            if v is not _dummy:
+                yield k
+
+    def __len__(self):
+        return len(self._values) - self._values.count(_dummy)
+
+    def __repr__(self):
+        return "<%r: %r>" % (self.__class__.__name__, list(self.items()))
+
+    def __reduce__(self):
+        # generated record classes are not importable. restored as Success/Failure
+        return (_restore_result, (self._ok, list(self.items())))
+
+    def on_failure(self):
+        self._ok = False
+        return self
+
+    def on_success(self):
+        self._ok = True
+        return self
+
+
+def _restore_result(ok, items):
+    result = Success() if ok else Failure()
+    for k, v in items:
+        result[k] = v
+    return result
+
+
+def _record_property(i, k):
+    def get(self):
+        v = self._values[i]
+        return self[k] if v is _dummy else v
+    return property(get)
+
+
+def make_record(name, keys):
+    """generate a Record class. fields are accessible as attribute, unless conflicted with Record's method"""
+    keys = tuple(keys)
+    attrs = {"__slots__": (),
+             "_keys": keys,
+             "_index": dict((k, i) for i, k in enumerate(keys))}
+    for i, k in enumerate(keys):
+        if not hasattr(Record, k):
+            attrs[k] = _record_property(i, k)
+    return type(name, (Record,), attrs)
+
+
+class Invalid(object):
+    """failure of converter. converters can return this instead of raising (raising and catching is slow).
+    the error is created by error(), only when it is collected"""
+    __slots__ = ("exc_type", "args")
+
+    def __init__(self, exc_type, *args):
+        self.exc_type = exc_type
+        self.args = args
+
+    @classmethod
+    def from_error(cls, e):
+        return cls(_identity, e)
+
+    def __nonzero__(self):
+        return False
+
+    def __bool__(self):
+        return False
+
+    def error(self):
+        return self.exc_type(*self.args)
+
+    def __repr__(self):
+        return "<%r %r>" % (self.__class__.__name__, self.error())
+
+
+def _identity(x):
+    return x
+
+
+class FrozenRecord(Mapping):
+    """immutable result. values are held in slots, so attribute access is direct"""
+    __slots__ = ()
+    _keys = ()
+    _slots = {}  # key -> slot name
+
+    def __init__(self, items):
+        slots = self._slots
+        for k, v in items:
+            object.__setattr__(self, slots[k], v)
+
+    def __setattr__(self, k, v):
+        raise AttributeError("{0!r} is frozen".format(self.__class__.__name__))
+
+    __delattr__ = __setattr__
+
+    def __getitem__(self, k):
+        try:
+            return getattr(self, self._slots[k])
+        except AttributeError:
+            raise KeyError(k)
+
+    def __iter__(self):
+        for k in self._keys:
+            if hasattr(self, self._slots[k]):
+                yield k
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return "<%r: %r>" % (self.__class__.__name__, list(self.items()))
+
+    def __reduce__(self):
+        # generated record classes are not importable. restored as Success
+        return (_restore_result, (True, list(self.items())))
+
+
+def make_frozen_record(name, keys):
+    """generate a FrozenRecord class. fields are slots, unless not identifier or conflicted with FrozenRecord's method"""
+    keys = tuple(keys)
+    slots = {}
+    for i, k in enumerate(keys):
+        if _identifier_rx.match(k) and not k.startswith("__") and not hasattr(FrozenRecord, k) and not iskeyword(k):
+            slots[k] = k
+        else:
+            slots[k] = "_f{0}".format(i)
+    attrs = {"__slots__": tuple(slots[k] for k in keys),
+             "_keys": keys,
+             "_slots": slots}
+    return type(name, (FrozenRecord,), attrs)
 
 
 class _Nil(object):
@@ -95,6 +368,9 @@ class _Nil(object):
     def __str__(self):
         return "<Nil>"
 
+    def __reduce__(self):
+        return "Nil"
+
 
 def gennil(*args, **kwargs):
     return Nil
@@ -1,19 +1,67 @@
 # -*- coding:utf-8 -*-
 
 from collections import namedtuple
-from collections import defaultdict
-from .langhelpers import warning
+from .langhelpers import warning, LRUCache, LazyPattern
 from .structure import ChainMapView
+from .compat import MappingProxyType
 from functools import partial
 
+# not threading, to keep import cheap
+try:
+    from _thread import allocate_lock, _local
+except ImportError:  # pragma: no cover
+    from thread import allocate_lock, _local
+
 _default = "default"
 _system_lang = "system"
 _display_lang = "display"
 
+# frozen snapshot. category -> lang -> name -> MessageString.
+# never mutated after published, writers build a new one and swap it (copy on write)
+_catalog = {}
+_empty = {}
+_write_lock = allocate_lock()
+_defaults_pending = True  # default messages are registered on first use (see _install_defaults())
+
+
+class _ThreadLocalVar(_local):
+    """fallback of ContextVar (only get/set/reset are supported)"""
+
+    def __init__(self, name, default=None):
+        self.value = default
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        token, self.value = self.value, value
+        return token
+
+    def reset(self, token):
+        self.value = token
+
+
+class _NoLocale(object):
+    """placeholder of _locale until use_locale() is called first (no context has its own locale yet)"""
 
-def dicttree():
-    return defaultdict(dicttree)
-_pool = dicttree()
+    def get(self):
+        return None
+
+# (system lang, display lang) of current context. None means module level default
+_locale = _NoLocale()
+
+
+def _get_locale_var():
+    global _locale
+    if _locale.__class__ is _NoLocale:
+        with _write_lock:
+            if _locale.__class__ is _NoLocale:
+                try:
+                    from contextvars import ContextVar
+                except ImportError:  # pragma: no cover
+                    ContextVar = _ThreadLocalVar
+                _locale = ContextVar("asobibi_locale", default=None)
+    return _locale
 
 
 class NotFound(Exception):
@@ -28,70 +76,273 @@ class RegisterMessageStringError(Exception):
     pass
 
 
+_formatter = None
+_simple_field_rx = LazyPattern(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _parse_format(fmt):
+    global _formatter
+    if _formatter is None:
+        from string import Formatter
+        _formatter = Formatter()
+    return _formatter.parse(fmt)
+
+
+def compile_format(fmt):
+    """parse fmt once. -> [(literal, name, conversion, spec)].
+    if fmt is not simple (positional, attribute, index or nested field), returns None"""
+    pieces = []
+    for literal, name, spec, conversion in _parse_format(fmt):
+        if name is not None:
+            if not _simple_field_rx.match(name) or conversion not in (None, "r", "s") or "{" in spec:
+                return None
+        pieces.append((literal, name, conversion, spec))
+    return pieces
+
+
+def render_format(pieces, mapping, defaults):
+    buf = []
+    for literal, name, conversion, spec in pieces:
+        if literal:
+            buf.append(literal)
+        if name is not None:
+            v = mapping[name] if name in mapping else defaults[name]
+            if conversion == "r":
+                v = repr(v)
+            elif conversion == "s":
+                v = str(v)
+            buf.append(format(v, spec))
+    return "".join(buf)
+
+
 class MessageString(namedtuple("MessageString", "fmt, mapping")):
 
+    def __new__(cls, fmt, mapping):
+        self = super(MessageString, cls).__new__(cls, fmt, mapping)
+        self.pieces = compile_format(fmt)
+        return self
+
     def __call__(self, mapping=None):
+        if self.pieces is not None:
+            return render_format(self.pieces, mapping or {}, self.mapping)
         if mapping is None:
             return self.fmt.format(**self.mapping)
         return self.fmt.format(**ChainMapView(mapping, self.mapping))
 
 
 def get_registry(category=None):
-    global _pool
-    category = category or _default
-    return _pool[category]
+    """lang -> name -> MessageString (read only)"""
+    if _defaults_pending:
+        _install_defaults()
+    langs = _catalog.get(category or _default, _empty)
+    return MappingProxyType(dict((lang, MappingProxyType(messages)) for lang, messages in langs.items()))
 
 
 def has_registry(category=_default):
-    global _pool
-    return category in _pool
+    if _defaults_pending:
+        _install_defaults()
+    return category in _catalog
 
 
-def translate(name, mapping, category=None):
-    global _system_lang
-    registry = get_registry(category)
-    try:
-        return registry[_system_lang][name](mapping)
-    except TypeError:  # not callable
+def get_catalog():
+    """current snapshot (read only)"""
+    if _defaults_pending:
+        _install_defaults()
+    return _catalog
+
+
+def set_catalog(catalog):
+    """swap whole catalog atomically. catalog is category -> lang -> name -> MessageString"""
+    global _catalog, _defaults_pending
+    catalog = dict((category, dict((lang, dict(messages)) for lang, messages in langs.items()))
+                   for category, langs in catalog.items())
+    with _write_lock:
+        _catalog = catalog
+        _defaults_pending = False
+        _loaded.clear()
+
+
+def get_system_lang():
+    locale = _locale.get()
+    return _system_lang if locale is None else locale[0]
+
+
+def get_display_lang():
+    locale = _locale.get()
+    return _display_lang if locale is None else locale[1]
+
+
+class _UseLocale(object):
+    def __init__(self, system, display):
+        self.system = system
+        self.display = display
+        self.token = None
+
+    def __enter__(self):
+        self.token = _get_locale_var().set((self.system or get_system_lang(), self.display or get_display_lang()))
+
+    def __exit__(self, *exc_info):
+        _locale.reset(self.token)
+
+
+def use_locale(system=None, display=None):
+    """select languages in this context (per thread, per asyncio task)"""
+    return _UseLocale(system, display)
+
+
+def get_messages(lang, category=None):
+    """all message strings of lang. name -> MessageString (read only)"""
+    category = category or _default
+    if _loaders and (category, lang) not in _loaded:
+        _load_messages(category, lang)
+    registry = _catalog.get(category, _empty).get(lang)
+    if registry is None:
+        if _defaults_pending:
+            _install_defaults()
+            return get_messages(lang, category)
+        return _empty
+    return registry
+
+
+def get_system_messages(category=None):
+    return get_messages(get_system_lang(), category)
+
+
+def get_display_messages(category=None):
+    return get_messages(get_display_lang(), category)
+
+
+def _lookup(lang, name, category):
+    message = get_messages(lang, category).get(name)
+    if message is None:
         raise MessageStringNotFound(name)
+    return message
+
+
+def translate(name, mapping, category=None):
+    return _lookup(get_system_lang(), name, category)(mapping)
 
 
 def unicode_translate(name, mapping, category=None):
-    global _display_lang
-    registry = get_registry(category)
-    try:
-        return registry[_display_lang][name](mapping)
-    except TypeError:  # not callable
-        raise MessageStringNotFound(name)
+    return _lookup(get_display_lang(), name, category)(mapping)
 
 
-def register(category, lang, name, fmt, mapping, force=False):
-    registry = get_registry(category)[lang]
-    if not force and name in registry:
-        warning("{name} is already registered(category={category})".format(name=name, category=category))
+# lazy loading catalog files
+_loaders = []  # [(category, directory)]
+_loaded = set()  # (category, lang) whose catalog files are loaded into _catalog
+_not_found = LRUCache(maxsize=256)  # (category, lang) which has no catalog file
+_lang_rx = LazyPattern(r"^[A-Za-z0-9_@-][A-Za-z0-9_@.-]*$")
+
+
+def add_catalog_directory(directory, category=None):
+    """messages of lang are loaded from <directory>/<lang>.json on first use, and cached.
+    the file is {name: fmt} or {name: {"fmt": fmt, "mapping": {...}}}.
+    registered messages (including default ones) are not overridden by the file"""
+    with _write_lock:
+        _loaders.append((category or _default, directory))
+        _loaded.clear()
+        _not_found.clear()
+
+
+def load_catalog_file(path):
+    """json file -> {name: MessageString}"""
+    import json
+    with open(path) as rf:
+        data = json.load(rf)
+    messages = {}
+    for name, v in data.items():
+        if hasattr(v, "get"):
+            fmt, mapping = v["fmt"], v.get("mapping") or {}
+        else:
+            fmt, mapping = v, {}
+        for _, k, _, _ in _parse_format(fmt):
+            if k and k not in mapping:
+                mapping[k] = DUMMY_STRING
+        messages[name] = build_message(fmt, mapping)
+    return messages
+
+
+def _load_messages(category, lang):
+    import os
+    key = (category, lang)
+    if not _lang_rx.match(lang) or _not_found.get(key) is not None:
+        return
+    messages = None
+    for loader_category, directory in _loaders:
+        path = os.path.join(directory, lang + ".json")
+        if loader_category == category and os.path.exists(path):
+            messages = messages or {}
+            messages.update(load_catalog_file(path))
+    if messages is None:
+        _not_found.set(key, True)
+        return
+    if _defaults_pending:
+        _install_defaults()
+    with _write_lock:
+        if key not in _loaded:
+            messages.update(_catalog.get(category, _empty).get(lang, _empty))
+            _publish(category, lang, messages)
+            _loaded.add(key)
+
+
+def build_message(fmt, mapping):
     # validation
     try:
         fmt.format(**mapping)
     except KeyError as e:
         raise RegisterMessageStringError("fmt='{fmt}' needs {k}".format(fmt=fmt, k=e))
-    s = registry[name] = MessageString(fmt, mapping)
+    return MessageString(fmt, mapping)
+
+
+def update_messages(category, lang, messages):
+    """register many {name: MessageString} at once (published atomically)"""
+    if _defaults_pending:
+        _install_defaults()
+    with _write_lock:
+        _publish(category, lang, messages)
+
+
+def _publish(category, lang, messages):
+    """swap _catalog with a copy having messages. (_write_lock must be held)"""
+    global _catalog
+    catalog = _catalog.copy()
+    langs = catalog[category] = catalog.get(category, _empty).copy()
+    registry = langs[lang] = langs.get(lang, _empty).copy()
+    registry.update(messages)
+    _catalog = catalog
+
+
+def register(category, lang, name, fmt, mapping, force=False):
+    if not force and name in get_messages(lang, category):
+        warning("{name} is already registered(category={category})".format(name=name, category=category))
+    s = build_message(fmt, mapping)
+    update_messages(category, lang, {name: s})
     return s
 
 
 def get_system_message_factory(category=None, lang=None):
-    global _default
-    global _system_lang
     return partial(register, (category or _default), (lang or _system_lang))
 
 
 def get_display_message_factory(category=None, lang=None):
-    global _default
-    global _display_lang
     return partial(register, (category or _default), (lang or _display_lang))
 
 SystemMessage = get_system_message_factory()
 DisplayMessage = get_display_message_factory()
 
 DUMMY_STRING = "----"
-SystemMessage("*missing", "{field} is Missing.", mapping={"field": DUMMY_STRING})
-DisplayMessage("*missing", u"{field} がみつかりません", mapping={"field": DUMMY_STRING})
+
+
+def _install_defaults():
+    """register default messages. deferred until the catalog is used first, to keep import cheap"""
+    global _defaults_pending
+    if not _defaults_pending:
+        return
+    system = {"*missing": build_message("{field} is Missing.", {"field": DUMMY_STRING})}
+    display = {"*missing": build_message(u"{field} がみつかりません", {"field": DUMMY_STRING})}
+    with _write_lock:
+        if _defaults_pending:  # installed by other thread while building
+            _publish(_default, _system_lang, system)
+            _publish(_default, _display_lang, display)
+            # cleared after published. readers seeing False never miss the defaults
+            _defaults_pending = False
@@ -0,0 +1,287 @@
+# -*- coding:utf-8 -*-
+"""
+benchmark suite.
+
+    $ python benchmarks/run.py run -o before.json
+    $ python benchmarks/run.py run -o after.json
+    $ python benchmarks/run.py compare before.json after.json --threshold 0.1
+    $ python benchmarks/run.py run --only import --import-budget 10
+
+`run` fails if `import asobibi` exceeds the budget (default: 20 ms, 0 disables it),
+or loads modules which must be imported on first use (DEFERRED_MODULES).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from asobibi import schema, validator, field, Op  # NOQA
+from asobibi.declarative import as_schema, column  # NOQA
+import asobibi.converters as c  # NOQA
+from asobibi.exceptions import ValidationError  # NOQA
+
+WORKLOADS = []
+
+
+def workload(fn):
+    WORKLOADS.append((fn.__name__, fn))
+    return fn
+
+
+# definitions
+@c.validation_from_condition
+def not_empty(x):
+    return x != ""
+
+
+@c.validation_from_condition
+def positive(x):
+    return x > 0
+
+UnicodeField = field(converters=[c.Unicode, not_empty])
+IntField = field(converters=[c.Int, positive])
+
+
+def _flat_fields(n=10):
+    return [UnicodeField("s{0}".format(i)) for i in range(n // 2)] + [IntField("i{0}".format(i)) for i in range(n // 2)]
+
+Flat = schema("Flat", _flat_fields())
+VALID = dict([("s{0}".format(i), "value") for i in range(5)] + [("i{0}".format(i), str(i + 1)) for i in range(5)])
+INVALID = dict([("s{0}".format(i), "") for i in range(5)] + [("i{0}".format(i), "x") for i in range(5)])
+
+
+def _build(fn):
+    def run(records, keep=None):
+        for data in records:
+            r = fn(data)
+            if keep is not None:
+                keep.append(r)
+    return run
+
+
+def _validate(cls):
+    def run(data):
+        o = cls(data)
+        o.validate()
+        return o
+    return run
+
+
+@workload
+def flat_valid(n):
+    return _build(_validate(Flat)), [VALID] * n
+
+
+@workload
+def flat_invalid(n):
+    return _build(_validate(Flat)), [INVALID] * n
+
+
+LARGE = dict(VALID, **dict(("extra{0}".format(i), "x" * 10) for i in range(1000)))
+
+
+@workload
+def large_body(n):
+    return _build(_validate(Flat)), [LARGE] * n
+
+
+def _check(k, x, y):
+    assert x != y
+
+Checked = validator("Checked", [((Flat.s0, "s{0}".format(i)), _check) for i in range(1, 5)] +
+                    [((Flat.i0, "i{0}".format(i)), _check) for i in range(1, 5)])
+
+
+@workload
+def validator_checks(n):
+    def run(data):
+        o = Checked(Flat(data))
+        o.validate()
+        return o
+    return _build(run), [VALID] * n
+
+
+Person = schema("Person", [UnicodeField("name"), IntField("age")])
+Address = schema("Address", [UnicodeField("prefecture"), UnicodeField("city")])
+Account = schema("Account", [("person", {Op.converters: [c.as_converter(Person)]}),
+                             ("address", {Op.converters: [c.as_converter(Address)]})])
+NESTED = {"person": {"name": "foo", "age": "20"}, "address": {"prefecture": "tokyo", "city": "chiyoda"}}
+
+
+@workload
+def nested(n):
+    return _build(_validate(Account)), [NESTED] * n
+
+
+@as_schema()
+class Declarative(object):
+    name = column(UnicodeField)
+    age = column(IntField)
+    mail = column(UnicodeField)
+
+
+@workload
+def declarative(n):
+    return _build(_validate(Declarative)), [{"name": "foo", "age": "20", "mail": "foo@example.com"}] * n
+
+
+@workload
+def message_render(n):
+    errors = [ValidationError(dict(name="*missing", field="name", value=None))] * n
+
+    def run(errors, keep=None):
+        for e in errors:
+            r = (str(e), e.__unicode__())
+            if keep is not None:
+                keep.append(r)
+    return run, errors
+
+
+@workload
+def construction(n):
+    def run(records, keep=None):
+        for _ in records:
+            r = schema("Flat", _flat_fields())
+            if keep is not None:
+                keep.append(r)
+    return run, [None] * max(1, n // 10)
+
+
+def measure(name, fn, n, repeat):
+    run, records = fn(n)
+    size = len(records)
+    run(records[:10])  # warm up
+    best = None
+    for _ in range(repeat):
+        t = time.perf_counter()
+        run(records)
+        elapsed = time.perf_counter() - t
+        best = elapsed if best is None else min(best, elapsed)
+
+    # allocations are measured by keeping all outputs alive
+    keep = []
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    run(records, keep=keep)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"name": name,
+            "records": size,
+            "seconds": best,
+            "records_per_second": size / best if best else None,
+            "bytes_per_record": (current - base) / float(size)}
+
+
+IMPORT_SCRIPT = """
+import sys, time, json
+before = set(sys.modules)
+t = time.perf_counter()
+import asobibi
+elapsed = time.perf_counter() - t
+sys.stdout.write(json.dumps([elapsed, sorted(set(sys.modules) - before)]))
+"""
+
+# not needed by `import asobibi` itself. loaded lazily, on first use
+DEFERRED_MODULES = ("inspect", "re", "copy", "json", "threading", "string", "contextvars", "contextlib",
+                    "asobibi.profiling", "asobibi.serialize", "asobibi.aio", "asobibi.parallel")
+
+
+def measure_import(repeat):
+    """`import asobibi` in fresh interpreters (best of repeat)"""
+    env = os.environ.copy()
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [ROOT, env.get("PYTHONPATH")] if p)
+    best = None
+    loaded = set()
+    for _ in range(max(repeat, 5)):
+        out = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], env=env)
+        elapsed, modules = json.loads(out.decode("ascii"))
+        best = elapsed if best is None else min(best, elapsed)
+        loaded.update(modules)
+    return {"name": "import",
+            "records": 1,
+            "seconds": best,
+            "records_per_second": 1.0 / best,
+            "bytes_per_record": None,
+            "eager_modules": sorted(m for m in DEFERRED_MODULES if m in loaded)}
+
+
+def run(args):
+    results = []
+    status = 0
+    if not args.only or "import" in args.only:
+        r = measure_import(args.repeat)
+        results.append(r)
+        sys.stderr.write("{name:<20} {0:>14.2f} ms\n".format(r["seconds"] * 1e3, **r))
+        if args.import_budget and r["seconds"] * 1e3 > args.import_budget:
+            sys.stderr.write("import time exceeds budget ({0} ms)\n".format(args.import_budget))
+            status = 1
+        if r["eager_modules"]:
+            sys.stderr.write("modules loaded by `import asobibi`, but should be deferred: {0}\n".format(
+                ", ".join(r["eager_modules"])))
+            status = 1
+    for name, fn in WORKLOADS:
+        if args.only and name not in args.only:
+            continue
+        r = measure(name, fn, args.number, args.repeat)
+        results.append(r)
+        sys.stderr.write("{name:<20} {records_per_second:>14,.0f} records/s {bytes_per_record:>10,.1f} bytes/record\n".format(**r))
+    data = {"python": sys.version, "results": results}
+    if args.output:
+        with open(args.output, "w") as wf:
+            json.dump(data, wf, indent=2)
+    return status
+
+
+def compare(args):
+    with open(args.base) as rf:
+        base = dict((r["name"], r) for r in json.load(rf)["results"])
+    with open(args.target) as rf:
+        target = dict((r["name"], r) for r in json.load(rf)["results"])
+
+    regressions = []
+    for name, r in sorted(target.items()):
+        if name not in base:
+            continue
+        before, after = base[name]["records_per_second"], r["records_per_second"]
+        ratio = after / before
+        status = "ok"
+        if ratio < 1.0 - args.threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        sys.stdout.write("{0:<20} {1:>14,.0f} -> {2:>14,.0f} ({3:+.1%}) {4}\n".format(name, before, after, ratio - 1.0, status))
+    return 1 if regressions else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="asobibi benchmarks")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("run")
+    p.add_argument("-o", "--output", default=None)
+    p.add_argument("-n", "--number", type=int, default=10000)
+    p.add_argument("-r", "--repeat", type=int, default=3)
+    p.add_argument("--only", nargs="*", default=None)
+    p.add_argument("--import-budget", type=float, default=20.0,
+                   help="fail if `import asobibi` takes longer (ms, default: 20, 0 disables)")
+    p.set_defaults(fn=run)
+
+    p = sub.add_parser("compare")
+    p.add_argument("base")
+    p.add_argument("target")
+    p.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown ratio (default: 0.1)")
+    p.set_defaults(fn=compare)
+
+    args = parser.parse_args(argv)
+    if not hasattr(args, "fn"):
+        parser.print_help()
+        return 2
+    return args.fn(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
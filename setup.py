@@ -31,7 +31,8 @@ setup(name='asobibi',
       cmdclass={'test': PyTest},
       tests_require=["pytest"],
       extras_require={
-          "testing": test_requires
+          "testing": test_requires,
+          "columnar": ["numpy"]
       },
       entry_points="""
       """,
@@ -0,0 +1,92 @@
+# -*- coding:utf-8 -*-
+import unittest
+import asyncio
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class AsyncValidationTests(unittest.TestCase):
+    def _get_schema(self, log):
+        from asobibi import schema, Op, Int
+
+        async def unique(k, x):
+            log.append(("start", k))
+            await asyncio.sleep(0.01)
+            log.append(("end", k))
+            if x == "taken":
+                raise AssertionError("{0} is taken".format(x))
+            return x
+
+        return schema("Account", [("name", {Op.converters: [unique]}),
+                                  ("nickname", {Op.converters: [unique]}),
+                                  ("age", {Op.converters: [Int], Op.required: False})])
+
+    def test_success(self):
+        log = []
+        account = self._get_schema(log)(name="foo", nickname="bar", age="20")
+        self.assertTrue(_run(account.avalidate()))
+        self.assertEqual(dict(account.result), {"name": "foo", "nickname": "bar", "age": 20})
+        # both lookups are started before either of them finishes
+        self.assertEqual([x for x, _ in log], ["start", "start", "end", "end"])
+
+    def test_failure__same_as_sync(self):
+        from asobibi import schema, Op, Int
+        Schema = schema("Account", [("name", {}), ("nickname", {}), ("age", {Op.converters: [Int]})])
+
+        account = self._get_schema([])(name="taken", age="x")
+        self.assertFalse(_run(account.avalidate()))
+
+        expected = Schema(name="taken", age="x")
+        expected.validate()
+        self.assertEqual(list(account.errors.keys()), ["name", "nickname", "age"])
+        self.assertEqual([str(e) for e in account.errors["name"]], ["taken is taken"])
+        self.assertEqual(str(account.errors["nickname"]), str(expected.errors["nickname"]))
+        self.assertEqual(str(account.errors["age"]), str(expected.errors["age"]))
+        self.assertFalse(account.result)
+
+    def test_validator(self):
+        from asobibi import validator
+        log = []
+        Schema = self._get_schema([])
+
+        async def remote_check(k, x, y):
+            log.append(k)
+            await asyncio.sleep(0.01)
+            assert x != y
+
+        def sync_check(k, x):
+            assert x != "boo"
+
+        Validator = validator("Validator", [(("name", "nickname"), remote_check),
+                                            (("nickname",), sync_check)])
+        target = Validator(Schema(name="foo", nickname="foo"))
+        self.assertFalse(_run(target.avalidate()))
+        self.assertEqual(list(target.errors.keys()), ["name"])
+
+        target = Validator(Schema(name="foo", nickname="bar"))
+        self.assertTrue(_run(target.avalidate()))
+        self.assertEqual(log, ["name", "name"])
+
+    def test_validator__update_after_avalidate(self):
+        from asobibi import schema, validator, Op, Int
+
+        def ordered(k, x, y):
+            if x >= y:
+                raise AssertionError("not ordered")
+
+        Schema = schema("Pair", [("a", {Op.converters: [Int]}), ("b", {Op.converters: [Int]})])
+        Validator = validator("Ordered", [(("a", "b"), ordered)])
+        target = Validator(Schema(a="5", b="1"))
+        self.assertFalse(_run(target.avalidate()))
+        self.assertEqual([str(e) for e in target.errors["a"]], ["not ordered"])
+
+        self.assertFalse(target.update(b="0"))
+        self.assertEqual([str(e) for e in target.errors["a"]], ["not ordered"])
+        self.assertTrue(target.update(b="9"))
+        self.assertIsNone(target.errors)
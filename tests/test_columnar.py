@@ -0,0 +1,88 @@
+# -*- coding:utf-8 -*-
+import pytest
+np = pytest.importorskip("numpy")
+
+
+def _get_schema():
+    from asobibi import schema, Op, Int, Float, validation_from_condition
+
+    positive = validation_from_condition(lambda x: x > 0, vectorized=True)
+    positive.__name__ = "positive"
+    return schema("Row", [("id", {Op.converters: [Int, positive]}),
+                          ("score", {Op.converters: [Float]}),
+                          ("label", {Op.converters: [lambda k, x: x.upper()], Op.required: False, Op.initial: "x"})])
+
+
+def test_vectorized():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    result = validate_columns(Row, {"id": np.array([1, -2, 3]), "score": np.array([0.5, 1, 2])})
+    assert result.mask.tolist() == [True, False, True]
+    assert result.columns["id"].tolist() == [1, -2, 3]
+    assert result.columns["score"].dtype == np.float64
+    assert result.columns["label"].tolist() == ["X", "X", "X"]
+    assert list(result.errors.keys()) == ["id"]
+    [(i, e)] = result.errors["id"]
+    assert i == 1
+    assert str(e) == "condition: positive(-2) is False"
+
+
+def test_float_to_int():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    result = validate_columns(Row, {"id": np.array([1.5, np.nan, 3.0]), "score": np.array([0.5, 1, 2])})
+    assert result.mask.tolist() == [True, False, True]
+    assert result.columns["id"][[0, 2]].tolist() == [1, 3]
+    assert [i for i, _ in result.errors["id"]] == [1]
+
+
+def test_fallback__same_as_schema():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    ids = ["1", "a", "-1"]
+    scores = [0.5, 1.0, 2.0]
+    result = validate_columns(Row, {"id": np.array(ids, dtype=object), "score": np.array(scores)})
+
+    expected = list(Row.validate_many([{"id": i, "score": s} for i, s in zip(ids, scores)]))
+    assert result.mask.tolist() == [not errors for _, _, errors in expected]
+    assert [(i, str(e)) for i, e in result.errors["id"]] == [(i, str(errors["id"][0])) for i, _, errors in expected if errors]
+
+
+def test_structured_array():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    data = np.array([(1, 0.5), (2, 1.5)], dtype=[("id", "i8"), ("score", "f8")])
+    result = validate_columns(Row, data)
+    assert result.mask.tolist() == [True, True]
+    assert result.errors == {}
+
+
+def test_missing_column():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    result = validate_columns(Row, {"id": np.array([1, 2])})
+    assert result.mask.tolist() == [False, False]
+    assert [i for i, _ in result.errors["score"]] == [0, 1]
+
+
+def test_float_to_int__error_same_as_int():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    xs = [np.nan, np.inf, -np.inf]
+    result = validate_columns(Row, {"id": np.array(xs), "score": np.array([0.5, 1, 2])})
+    expected = []
+    for x in xs:
+        try:
+            int(x)
+        except (ValueError, OverflowError) as e:
+            expected.append((e.__class__, str(e)))
+    assert [(e.__class__, str(e)) for _, e in result.errors["id"]] == expected
+
+
+def test_uint64_out_of_int64_range():
+    from asobibi.columnar import validate_columns
+    Row = _get_schema()
+    ids = np.array([1, 2 ** 63, 2 ** 64 - 1], dtype=np.uint64)
+    result = validate_columns(Row, {"id": ids, "score": np.array([0.5, 1, 2])})
+    assert result.mask.tolist() == [True, True, True]
+    assert result.columns["id"].tolist() == [1, 2 ** 63, 2 ** 64 - 1]
@@ -1,3 +1,4 @@
+# -*- coding:utf-8 -*-
 import pytest
 
 
@@ -521,3 +522,798 @@ class TestsDeepNest(object):
 
         from asobibi.langhelpers import flatten_dict
         assert list(flatten_dict(a.errors).keys()) == ["b.c.d.e"]
+
+
+class TestsCompiledSchemaFeature(TestsSchemaFeature):
+    def _getTarget(self):
+        from functools import partial
+        from asobibi import schema
+        return partial(schema, compiled=True)
+
+
+class TestsCompiledSchemaPartial(TestsSchemaPartial):
+    def _getTarget(self):
+        from functools import partial
+        from asobibi import schema
+        return partial(schema, compiled=True)
+
+
+class TestsCompiledSchema(object):
+    def _getComplexSchema(self, compiled):
+        from asobibi import schema
+        from asobibi import Op, Int, as_converter
+
+        def positive(k, x):
+            assert x >= 0
+            return x
+        Point = schema("Point", [("x", {Op.converters: [Int]}),
+                                 ("y", {Op.converters: [Int, positive]}),
+                                 ("z", {Op.required: False, Op.converters: [Int]})],
+                       compiled=compiled)
+        return schema("Line", [("src", {Op.converters: [as_converter(Point)]}),
+                               ("dst", {Op.converters: [as_converter(Point)]})],
+                      compiled=compiled)
+
+    def test_plan_is_built_on_class_creation(self):
+        from asobibi import Int, Op, schema
+        Schema = schema("Schema", [("x", {Op.converters: [Int]}),
+                                   ("y", {Op.required: False})], compiled=True)
+        assert Schema._plan == [("x", True, (Int,)), ("y", False, ())]
+
+    def test_same_output_as_not_compiled(self):
+        from asobibi.langhelpers import flatten_dict
+        params = [{"src": {"x": "1", "y": "2"}, "dst": {"x": "3", "y": "4", "z": "5"}},
+                  {"src": {"x": "1", "y": "-2"}, "dst": {"x": "a"}},
+                  {}]
+        for data in params:
+            expected = self._getComplexSchema(compiled=False)(data)
+            actual = self._getComplexSchema(compiled=True)(data)
+            assert expected.validate() == actual.validate()
+            assert repr(expected.result) == repr(actual.result)
+            assert str(flatten_dict(expected.errors or {})) == str(flatten_dict(actual.errors or {}))
+
+
+class TestsValidateMany(object):
+    def _get_schema(self):
+        from asobibi import schema
+        from asobibi import Op, Int
+        return schema("Point", [("x", {Op.converters: [Int]}),
+                                ("y", {Op.converters: [Int], Op.required: False, Op.initial: 0})])
+
+    def test_it(self):
+        Point = self._get_schema()
+        result = list(Point.validate_many([{"x": "1", "y": "2"}, {"x": "a"}, {"x": "3"}]))
+
+        assert [i for i, _, _ in result] == [0, 1, 2]
+        assert dict(result[0][1]) == {"x": 1, "y": 2}
+        assert result[0][2] is None
+        assert not result[1][1]
+        assert list(result[1][2].keys()) == ["x"]
+        assert dict(result[2][1]) == {"x": 3, "y": 0}
+        assert result[2][2] is None
+
+    def test_same_as_one_by_one(self):
+        Point = self._get_schema()
+        records = [{"x": "1", "y": "2"}, {"x": "a", "y": "b"}, {}]
+        for (_, result, errors), data in zip(Point.validate_many(records), records):
+            point = Point(data)
+            point.validate()
+            assert repr(point.result) == repr(result)
+            assert str(point.errors) == str(errors)
+
+    def test_with_validators(self):
+        from asobibi import validator, WithExtra
+        Point = self._get_schema()
+
+        @WithExtra
+        def smaller(k, x, y, limit):
+            assert x + y < limit
+        Validator = validator("Validator", [(("x", "y"), smaller)])
+
+        result = list(Point.validate_many([{"x": "1", "y": "2"}, {"x": "10", "y": "2"}],
+                                          validators=[Validator], extra={"limit": 10}))
+        assert result[0][2] is None
+        assert list(result[1][2].keys()) == ["x"]
+
+
+class TestsRecordSchemaFeature(TestsSchemaFeature):
+    def _getTarget(self):
+        from functools import partial
+        from asobibi import schema
+        return partial(schema, record=True)
+
+
+class TestsRecordSchema(object):
+    def _get_schema(self, **kwargs):
+        from asobibi import schema
+        from asobibi import Op, Int
+        return schema("Point", [("x", {Op.converters: [Int]}),
+                                ("y", {Op.converters: [Int]}),
+                                ("items", {Op.required: False})], record=True, **kwargs)
+
+    def test_success(self):
+        from asobibi import Nil
+        from asobibi.structure import Record
+        point = self._get_schema()(x="10", y="20")
+        assert point.validate() is True
+        result = point.result
+        assert isinstance(result, Record)
+        assert not hasattr(result, "__dict__")
+        assert result
+        assert result.x == 10
+        assert result["y"] == 20
+        assert list(result.keys()) == ["x", "y", "items"]
+        assert result == {"x": 10, "y": 20, "items": Nil}
+        # conflicted with Mapping's method. but accessible by key.
+        assert result["items"] is Nil
+
+    def test_failure(self):
+        from asobibi.structure import Missing
+        point = self._get_schema()(x="a")
+        assert point.validate() is False
+        result = point.result
+        assert not result
+        assert result.x == "a"
+        assert isinstance(result["y"], Missing)
+        assert result.get("unknown", 1) == 1
+
+    def test_compiled(self):
+        point = self._get_schema(compiled=True)(x="10", y="20")
+        assert point.validate() is True
+        assert point.result.x == 10
+
+    def test_with_validator(self):
+        from asobibi import validator
+
+        def ordered(k, x, y):
+            assert x < y
+        Point = self._get_schema()
+        point = validator("V", [((Point.x, Point.y), ordered)])(Point(x="20", y="10"))
+        assert point.validate() is False
+        assert list(point.errors.keys()) == ["x"]
+        assert not point.result
+
+    def test_pickle(self):
+        import pickle
+        point = self._get_schema()(x="10", y="a")
+        point.validate()
+        restored = pickle.loads(pickle.dumps(point.result))
+        assert not restored
+        assert dict(restored) == dict(point.result)
+
+
+class TestsFailFast(object):
+    def _get_schema(self, log, **kwargs):
+        from asobibi import schema
+        from asobibi import Op, Int
+
+        def logged(k, x):
+            log.append(k)
+            return x
+        return schema("Point", [("x", {Op.converters: [logged, Int]}),
+                                ("y", {Op.converters: [logged, Int]}),
+                                ("z", {Op.converters: [logged, Int]})], fail_fast=True, **kwargs)
+
+    def test_it(self):
+        log = []
+        point = self._get_schema(log)(x="1", y="a", z="b")
+        assert point.validate() is False
+        assert not point.result
+        assert log == ["x", "y"]
+        assert list(point.errors.keys()) == ["y"]
+        assert len(point.errors["y"]) == 1
+
+    def test_compiled(self):
+        log = []
+        point = self._get_schema(log, compiled=True)(x="a", y="b", z="c")
+        assert point.validate() is False
+        assert log == ["x"]
+        assert list(point.errors.keys()) == ["x"]
+
+    def test_success(self):
+        log = []
+        point = self._get_schema(log)(x="1", y="2", z="3")
+        assert point.validate() is True
+        assert log == ["x", "y", "z"]
+
+    def test_validator(self):
+        from asobibi import validator
+        log = []
+
+        def check(k, x):
+            log.append(k)
+            assert False
+
+        def check2(k, y, z):
+            log.append(k)
+            assert False
+        Point = self._get_schema([])
+        V = validator("V", [("x", check), (("y", "z"), check2)], fail_fast=True)
+
+        point = V(Point(x="1", y="a", z="3"))
+        assert point.validate() is False
+        assert log == []
+
+        point = V(Point(x="1", y="2", z="3"))
+        assert point.validate() is False
+        assert log == ["x"]
+        assert list(point.errors.keys()) == ["x"]
+
+    def test_update(self):
+        for options in [{}, {"compiled": True}]:
+            point = self._get_schema([], **options)(x="a", y="b", z="3")
+            assert point.validate() is False
+            assert point.update(x="1") is False
+            assert list(point.errors.keys()) == ["y"]
+            assert point.update(y="2") is True
+            assert dict(point.result) == {"x": 1, "y": 2, "z": 3}
+
+    def test_update__validator(self):
+        from asobibi import validator
+
+        def check(k, x):
+            if x < 0:
+                raise AssertionError("negative")
+        V = validator("V", [("x", check), ("y", check)], fail_fast=True)
+        point = V(self._get_schema([])(x="-1", y="-1", z="3"))
+        assert point.validate() is False
+        assert list(point.errors.keys()) == ["x"]
+        assert point.update(x="1") is False
+        assert list(point.errors.keys()) == ["y"]
+        assert point.update(y="1") is True
+
+
+class TestsUpdate(object):
+    def _get_schema(self, log, **kwargs):
+        from asobibi import schema
+        from asobibi import Op, Int
+
+        def logged(k, x):
+            log.append(k)
+            return x
+        return schema("Point", [("x", {Op.converters: [logged, Int]}),
+                                ("y", {Op.converters: [logged, Int]}),
+                                ("z", {Op.converters: [logged, Int]})], **kwargs)
+
+    def test_it(self):
+        log = []
+        point = self._get_schema(log)(x="1", y="a", z="3")
+        assert point.validate() is False
+        assert list(point.errors.keys()) == ["y"]
+
+        log[:] = []
+        assert point.update(y="2") is True
+        assert log == ["y"]
+        assert point.errors is None
+        assert point.result
+        assert dict(point.result) == {"x": 1, "y": 2, "z": 3}
+        assert point.y == 2
+
+        assert point.update(z="b") is False
+        assert log == ["y", "z"]
+        assert list(point.errors.keys()) == ["z"]
+        assert not point.result
+
+    def test_compiled(self):
+        log = []
+        point = self._get_schema(log, compiled=True)(x="1", y="a", z="3")
+        assert point.validate() is False
+
+        log[:] = []
+        assert point.update({"y": "2"}) is True
+        assert log == ["y"]
+        assert dict(point.result) == {"x": 1, "y": 2, "z": 3}
+
+    def test_before_validate(self):
+        log = []
+        point = self._get_schema(log)(x="1", y="a", z="3")
+        assert point.update(y="2") is True
+        assert log == ["x", "y", "z"]
+
+    def test_validator(self):
+        from asobibi import validator
+        checked = []
+
+        def ordered(k, x, y):
+            checked.append("ordered")
+            assert x < y
+
+        def positive(k, z):
+            checked.append("positive")
+            assert z > 0
+
+        Point = self._get_schema([])
+        V = validator("V", [(("x", "y"), ordered), ("z", positive)])
+        point = V(Point(x="1", y="0", z="3"))
+        assert point.validate() is False
+        assert list(point.errors.keys()) == ["x"]
+
+        checked[:] = []
+        # errors of "x" are issued by the check on ("x", "y")
+        assert point.update(y="2") is True
+        assert checked == ["ordered"]
+        assert point.errors is None
+        assert point.result
+
+        checked[:] = []
+        assert point.update(z="-1") is False
+        assert checked == ["positive"]
+        assert list(point.errors.keys()) == ["z"]
+
+    def test_validator__field_error_and_check_error(self):
+        from asobibi import validator
+
+        def ordered(k, y, x):
+            assert x < y
+
+        Point = self._get_schema([])
+        V = validator("V", [(("y", "x"), ordered)])
+        point = V(Point(x="2", y="1", z="c"))
+        assert point.validate() is False
+        assert list(point.errors.keys()) == ["z", "y"]
+
+        assert point.update(x="0") is False
+        assert list(point.errors.keys()) == ["z"]
+
+        assert point.update(z="3") is True
+        assert point.errors is None
+
+
+class TestsPureConverter(object):
+    def _get_schema(self, log):
+        from asobibi import schema, pure, Op, ValidationError
+
+        @pure(maxsize=2)
+        def parse(k, x):
+            log.append(x)
+            if not x.isdigit():
+                raise ValidationError(dict(fmt="{field}: {value} is not digit", field=k, value=x))
+            return int(x)
+        return schema("Point", [("x", {Op.converters: [parse]}),
+                                ("y", {Op.converters: [parse]})]), parse
+
+    def test_it(self):
+        log = []
+        Point, parse = self._get_schema(log)
+
+        for _ in range(3):
+            point = Point(x="1", y="a")
+            assert point.validate() is False
+            assert point.result["x"] == 1
+            assert [str(e) for e in point.errors["y"]] == ["y: a is not digit"]
+        assert log == ["1", "a"]
+        assert parse.cache_info().hits == 4
+        assert parse.cache_info().misses == 2
+
+    def test_unhashable(self):
+        log = []
+        _, parse = self._get_schema(log)
+        import pytest
+        with pytest.raises(AttributeError):
+            parse("x", ["1"])
+        assert log == [["1"]]
+
+
+class TestsFlattenSchema(object):
+    def _get_schema(self, flatten):
+        from asobibi import schema
+        from asobibi import Op, Int, Unicode, as_converter
+        Pair = schema("Pair", [("left", {Op.converters: [Unicode, lambda k, x: x.capitalize()]}),
+                               ("right", {Op.converters: [Int]}),
+                               ("extra", {Op.required: False, Op.initial: None})])
+        B = schema("B", [("pair", {Op.converters: [as_converter(Pair)]}),
+                         ("n", {Op.converters: [Int]})], flatten=flatten)
+        return schema("A", [("b", {Op.converters: [as_converter(B)]}),
+                            ("pair", {Op.converters: [as_converter(Pair)]}),
+                            ("z", {Op.required: False})], flatten=flatten)
+
+    def test_plan(self):
+        from asobibi.construct import Nested
+        A = self._get_schema(flatten=True)
+        _, _, converters = A._plan[0]
+        assert isinstance(converters, Nested)
+        assert converters.schema.__name__ == "B"
+        assert [k for k, _, _ in converters.plan] == ["pair", "n"]
+
+    def test_same_as_nested(self):
+        from asobibi.langhelpers import flatten_dict
+        params = [{"b": {"pair": {"left": "x", "right": "1"}, "n": "2"}, "pair": {"left": "y", "right": "3"}},
+                  {"b": {"pair": {"left": "x", "right": "a"}, "n": "b"}, "pair": {"right": "3"}},
+                  {"b": {}, "pair": {"left": "y", "right": "3"}},
+                  {"b": "notadict", "pair": {"left": "y", "right": "3"}},
+                  {"b": {"pair": "notadict", "n": "2"}, "pair": {"left": "y", "right": "3"}}]
+        for data in params:
+            expected = self._get_schema(flatten=False)(data)
+            actual = self._get_schema(flatten=True)(data)
+            assert expected.validate() == actual.validate()
+            assert repr(expected.result) == repr(actual.result)
+            expected_errors = flatten_dict(expected.errors or {})
+            assert list(expected_errors.keys()) == list((actual.errors or {}).keys())
+            for k, e in expected_errors.items():
+                assert [str(x) for x in actual.errors[k]] == [str(x) for x in e]
+
+    def test_update(self):
+        A = self._get_schema(flatten=True)
+        a = A({"b": {"pair": {"left": "x", "right": "a"}, "n": "1"}, "pair": {"left": "y", "right": "3"}})
+        assert a.validate() is False
+        assert list(a.errors.keys()) == ["b.pair.right"]
+
+        assert a.update(b={"pair": {"left": "x", "right": "2"}, "n": "1"}) is True
+        assert a.result.b.pair.right == 2
+
+    def test_same_as_sync__profiling_and_async(self):
+        import asyncio
+        from asobibi import profiling
+        A = self._get_schema(flatten=True)
+        for data in [{"b": {"pair": {"left": "x", "right": "a"}, "n": "b"}, "pair": {"right": "3"}},
+                     {"b": {}, "pair": {"left": "y", "right": "3"}},
+                     {"b": "notadict", "pair": {"left": "y", "right": "3"}}]:
+            expected = A(data)
+            expected.validate()
+            with profiling.profile() as profiler:
+                profiled = A(data)
+                profiled.validate()
+            assert profiler.stats
+            loop = asyncio.new_event_loop()
+            try:
+                aio = A(data)
+                loop.run_until_complete(aio.avalidate())
+            finally:
+                loop.close()
+            for actual in [profiled, aio]:
+                assert repr(actual.result) == repr(expected.result)
+                assert list(actual.errors.keys()) == list(expected.errors.keys())
+                assert str(actual.errors) == str(expected.errors)
+
+
+class TestsSequence(object):
+    def _get_schema(self, **kwargs):
+        from asobibi import schema, field, Int, Unicode, as_sequence
+        Item = schema("Item", [field(converters=[Unicode])("name"),
+                               field(converters=[Int])("count")])
+        return schema("Order", [field(converters=[as_sequence(Item, **kwargs)])("items")])
+
+    def test_success(self):
+        Order = self._get_schema()
+        order = Order(items=[{"name": "a", "count": "1"}, {"name": "b", "count": "2"}])
+        assert order.validate() is True
+        assert [dict(x) for x in order.result["items"]] == [{"name": "a", "count": 1}, {"name": "b", "count": 2}]
+
+    def test_failure(self):
+        from asobibi.langhelpers import flatten_dict
+        Order = self._get_schema()
+        order = Order(items=[{"name": "a", "count": "x"}, {"name": "b", "count": "2"}, {"count": "3"}])
+        assert order.validate() is False
+        assert not order.result
+        assert list(flatten_dict(order.errors).keys()) == ["items.0.count", "items.2.name"]
+        assert order.result["items"][1]["count"] == 2
+
+    def test_max_errors(self):
+        Order = self._get_schema(max_errors=1)
+        items = [{"name": "a", "count": "x"}, {"name": "b", "count": "y"}]
+        order = Order(items=items)
+        assert order.validate() is False
+        assert list(order.errors["items"][0].keys()) == [0]
+        assert order.result["items"][1] is items[1]
+
+    def test_not_sequence(self):
+        Order = self._get_schema()
+        order = Order(items="xxx")
+        assert order.validate() is False
+        assert [str(e) for e in order.errors["items"]] == ["items is not a sequence"]
+
+    def test_declarative(self):
+        from asobibi import schema, field, Int, as_sequence
+        from asobibi.declarative import as_schema, column
+        Item = schema("Item", [field(converters=[Int])("count")])
+
+        @as_schema()
+        class Order(object):
+            items = column(field(converters=[as_sequence(Item)]))
+        order = Order(items=[{"count": "1"}])
+        assert order.validate() is True
+        assert order.result["items"][0]["count"] == 1
+
+
+class TestsMaterialize(object):
+    def _get_schema(self, **kwargs):
+        from asobibi import schema, Op, Int
+        return schema("Point", [("x", {Op.converters: [Int]}), ("y", {Op.converters: [Int]})], **kwargs)
+
+    def test_it(self):
+        Point = self._get_schema(materialize=True)
+        pt = Point(x="10", y="20")
+        assert pt.x == "10"
+        assert "x" not in pt.__dict__
+        assert pt.validate() is True
+        assert pt.__dict__["x"] == 10
+        assert (pt.x, pt.y) == (10, 20)
+        assert Point.x == "x"
+
+    def test_failure__not_materialized(self):
+        Point = self._get_schema(materialize=True)
+        pt = Point(x="10", y="y")
+        assert pt.validate() is False
+        assert "x" not in pt.__dict__
+        assert pt.x == 10
+
+    def test_update(self):
+        Point = self._get_schema(materialize=True)
+        pt = Point(x="10", y="20")
+        pt.validate()
+        assert pt.update(y="y") is False
+        assert "x" not in pt.__dict__
+        assert pt.update(y="30") is True
+        assert (pt.x, pt.y) == (10, 30)
+
+    def test_validator__failure(self):
+        from asobibi import validator
+        Point = self._get_schema(materialize=True)
+
+        def ordered(k, x, y):
+            assert x < y
+
+        OrderedPoint = validator("OrderedPoint", [((Point.x, Point.y), ordered)])
+        target = OrderedPoint(Point(x="20", y="10"))
+        assert target.validate() is False
+        assert "x" not in target.schema.__dict__
+
+        target = OrderedPoint(Point(x="10", y="20"))
+        assert target.validate() is True
+        assert target.schema.__dict__["y"] == 20
+
+    def test_validate_many(self):
+        Point = self._get_schema(materialize=True)
+        rows = list(Point.validate_many([{"x": "1", "y": "2"}, {"x": "1", "y": "y"}]))
+        assert [errors is None for _, _, errors in rows] == [True, False]
+
+    def test_freeze(self):
+        import pickle
+        import pytest
+        Point = self._get_schema(record=True)
+        frozen = Point(x="10", y="20").freeze()
+        assert (frozen.x, frozen.y) == (10, 20)
+        assert dict(frozen) == {"x": 10, "y": 20}
+        assert not hasattr(frozen, "__dict__")
+        with pytest.raises(AttributeError):
+            frozen.x = 1
+        assert dict(pickle.loads(pickle.dumps(frozen))) == {"x": 10, "y": 20}
+        with pytest.raises(ValueError):
+            Point(x="x", y="20").freeze()
+
+    def test_freeze__not_identifier(self):
+        from asobibi import schema
+        Schema = schema("Schema", [("a-b", {}), ("items", {}), ("class", {})])
+        frozen = Schema(**{"a-b": 1, "items": 2, "class": 3}).freeze()
+        assert dict(frozen) == {"a-b": 1, "items": 2, "class": 3}
+
+
+class TestsInvalid(object):
+    def _legacy_errors(self, values):
+        errors = []
+        for convert, v in values:
+            try:
+                convert(v)
+            except ValueError as e:
+                errors.append(str(e))
+        return errors
+
+    def test_builtin_converters(self):
+        from asobibi import Int, Float, Invalid
+        values = [(int, "x"), (int, ""), (int, "1.5"), (int, "x" * 300), (float, "x"), (float, "")]
+        converted = [(Int if convert is int else Float)("k", v) for convert, v in values]
+        assert all(v.__class__ is Invalid for v in converted)
+        assert [str(v.error()) for v in converted] == self._legacy_errors(values)
+
+        assert Int("k", " -1_0 ") == -10
+        assert Float("k", "1e3") == 1000.0
+        assert Float("k", " -Infinity ") == float("-inf")
+
+    def test_engines(self):
+        from asobibi import schema, validator, Op, Int, validation_from_condition
+        from asobibi.converters import as_returning, as_raising
+
+        @validation_from_condition
+        def positive(x):
+            return x > 0
+
+        def legacy(k, x):
+            assert x != 10, "ten"
+            return x
+
+        fields = [("x", {Op.converters: [Int, positive, as_returning(legacy)]}),
+                  ("y", {Op.converters: [Int]}),
+                  ("z", {})]
+        data = [{"x": "x", "y": "1", "z": "z"}, {"x": "-1", "y": "y"}, {"x": "10", "y": "1", "z": None}]
+        expected = None
+        for options in [{}, {"compiled": True}, {"flatten": True}]:
+            Schema = schema("Schema", fields, **options)
+            actual = []
+            for d in data:
+                target = Schema(d)
+                target.validate()
+                actual.append((dict(target.result), str(target.errors)))
+            expected = expected or actual
+            assert actual == expected
+        assert expected[0][1].endswith(str(dict(x=["invalid literal for int() with base 10: 'x'"])))
+
+        with pytest.raises(ValueError):
+            as_raising(Int)("x", "x")
+
+        def ordered(k, x, y):
+            return None if x < y else positive(k, -1)
+
+        Ordered = validator("Ordered", [(("x", "y"), ordered)])
+        target = Ordered(Schema(x="2", y="1", z="z"))
+        assert target.validate() is False
+        assert list(target.errors.keys()) == ["x"]
+
+
+    def test_as_validation(self):
+        from asobibi import schema, Op, Int, Invalid, as_validation
+        assert as_validation(Int)("k", "1") == "1"
+        assert as_validation(Int)("k", "abc").__class__ is Invalid
+        target = schema("S", [("x", {Op.converters: [as_validation(Int)]})])(x="abc")
+        assert target.validate() is False
+
+class TestsErrorRecord(object):
+    def _get_schema(self, **kwargs):
+        from asobibi import schema, Op, Int
+        return schema("Point", [("x", {Op.converters: [Int]}), ("y", {})], **kwargs)
+
+    def test_it(self):
+        from asobibi.construct import ErrorRecord
+        Point = self._get_schema()
+        pt = Point(x="a")
+        pt.validate()
+        x, = pt.errors["x"]
+        assert x.__class__ is ErrorRecord
+        assert str(x) == str(ValueError("invalid literal for int() with base 10: 'a'"))
+        assert repr(x) == repr(ValueError("invalid literal for int() with base 10: 'a'"))
+        assert str(pt.errors["y"][0]) == "y is Missing."
+        assert pt.errors.render() == {"x": ["invalid literal for int() with base 10: 'a'"], "y": ["y is Missing."]}
+        assert pt.errors.render(display=True)["y"] == [u"y がみつかりません"]
+
+    def test_interned(self):
+        Point = self._get_schema()
+        rows = list(Point.validate_many([{"x": "a"}, {"x": "a"}, {"x": 1}]))
+        assert rows[0][2]["x"][0] is rows[1][2]["x"][0]
+        assert rows[0][2]["y"][0] is rows[2][2]["y"][0]
+
+    def test_traceback_is_dropped(self):
+        from asobibi import schema, Op
+
+        class MyError(ValueError):
+            pass
+
+        def fail(k, x):
+            raise MyError(k)
+
+        target = schema("S", [("x", {Op.converters: [fail]})])(x=1)
+        target.validate()
+        e, = target.errors["x"]
+        assert isinstance(e, MyError)
+        assert e.__traceback__ is None
+
+    def test_debug(self):
+        Point = self._get_schema(debug=True)
+        pt = Point(x="a", y="b")
+        pt.validate()
+        e, = pt.errors["x"]
+        assert e.__class__ is ValueError
+
+
+class TestsResultStatus(object):
+    def test_it(self):
+        from asobibi.structure import Success, Failure, Missing
+        result = Success()
+        result["x"] = 1
+        failure = result.on_failure()
+        assert failure is result
+        assert failure.__class__ is Failure
+        assert not failure
+        assert isinstance(failure["y"], Missing)
+        success = failure.on_success()
+        assert success is result
+        assert success.__class__ is Success
+        assert list(success.keys()) == ["x", "y"]
+
+    def test_schema(self):
+        from asobibi import schema, Op, Int
+        Point = schema("Point", [("x", {Op.converters: [Int]}), ("y", {Op.converters: [Int]})])
+        pt = Point(x="1", y="a")
+        assert pt.validate() is False
+        assert not pt.result
+        assert pt.result["x"] == 1
+        assert pt.update(y="2") is True
+        assert pt.result and dict(pt.result) == {"x": 1, "y": 2}
+
+
+class TestsRawData(object):
+    def test_not_copied(self):
+        from asobibi import schema, Op, Int
+        from asobibi.structure import RawData
+        Point = schema("Point", [("x", {Op.converters: [Int]}), ("y", {Op.initial: 0})])
+        data = {"x": "1", "body": "x" * 100}
+        pt = Point(data, z=3)
+        assert pt.validate() is True
+        assert dict(pt.result) == {"x": 1, "y": 0}
+        rawdata = pt.rawdata
+        assert isinstance(rawdata, RawData)
+        assert "body" not in rawdata.data
+        assert list(rawdata.keys()) == ["x", "body", "z", "y"]
+        assert rawdata == {"x": "1", "body": "x" * 100, "z": 3, "y": 0}
+        assert rawdata.get("body") == "x" * 100
+        assert rawdata.get("missing") is None
+
+    def test_copy_on_write(self):
+        from asobibi.structure import RawData
+        data = {"x": 1, "y": 2}
+        rawdata = RawData(data, {"z": 3})
+        rawdata["x"] = 10
+        del rawdata["y"]
+        assert rawdata.pop("z") == 3
+        assert rawdata == {"x": 10}
+        assert data == {"x": 1, "y": 2}
+
+    def test_handed_out(self):
+        from asobibi.structure import RawData
+        rawdata = RawData({"x": 1, "y": 2}, {"z": 3})
+        expected = {"x": 1, "y": 2, "z": 3}
+        assert dict(rawdata) == expected
+        assert dict(**rawdata) == expected
+        d = {}
+        d.update(rawdata)
+        assert d == expected
+        assert rawdata.copy() == expected
+
+
+class TestsSparse(object):
+    def _get_schema(self, **kwargs):
+        from asobibi import schema, Op, Int
+        return schema("Item", [("name", {}), ("price", {Op.converters: [Int]}), ("stock", {Op.converters: [Int]})],
+                      **kwargs)
+
+    def test_partial__data_is_not_modified(self):
+        Item = self._get_schema()
+        data = {"name": "foo"}
+        item = Item.partial(data, price="10")
+        assert item.validate() is True
+        assert dict(item.result) == {"price": 10}
+        assert data == {"name": "foo"}
+
+    def test_sparse(self):
+        Item = self._get_schema()
+        item = Item.sparse({"stock": "1", "unknown": "x"}, price="10")
+        assert item.validate() is True
+        assert dict(item.result) == {"price": 10, "stock": 1}
+
+        item = Item.sparse({"stock": "x"})
+        assert item.validate() is False
+        assert list(item.errors.keys()) == ["stock"]
+
+    def test_empty_fields(self):
+        for options in [{}, {"compiled": True}]:
+            Item = self._get_schema(**options)
+            item = Item({"price": "x"}, [])
+            assert item.validate() is True
+            assert dict(item.result) == {}
+
+    def test_sparse__no_declared_keys(self):
+        for options in [{}, {"compiled": True}]:
+            Item = self._get_schema(**options)
+            item = Item.sparse({"zzz": 1})
+            assert item.validate() is True
+            assert dict(item.result) == {}
+            assert item.errors is None
+
+    def test_sparse__subset_is_cached(self):
+        for options in [{}, {"compiled": True}]:
+            Item = self._get_schema(**options)
+            x = Item.sparse({"stock": "1", "price": "2"})
+            y = Item.sparse({"price": "3", "stock": "4"})
+            assert x._fields is y._fields
+            assert [k for k, _ in x._fields] == ["price", "stock"]
+            if options:
+                assert x._plan is y._plan
+                assert [k for k, _, _ in x._plan] == ["price", "stock"]
@@ -147,5 +147,25 @@ class FlattenErrorsTests(unittest.TestCase):
                            'a.x': ['xxxx'],
                            })
 
+
+class LRUCacheTests(unittest.TestCase):
+
+    def _makeOne(self, *args, **kwargs):
+        from asobibi.langhelpers import LRUCache
+        return LRUCache(*args, **kwargs)
+
+    def test_it(self):
+        target = self._makeOne(maxsize=2)
+        target.set("a", 1)
+        target.set("b", 2)
+        self.assertEqual(target.get("a"), 1)
+        target.set("c", 3)
+
+        self.assertEqual(target.get("b", None), None)
+        self.assertEqual(target.get("a"), 1)
+        self.assertEqual(target.get("c"), 3)
+        self.assertEqual(tuple(target.info()), (3, 1, 2, 2))
+
+
 if __name__ == "__main__":
     unittest.main()
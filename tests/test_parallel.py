@@ -0,0 +1,70 @@
+# -*- coding:utf-8 -*-
+import unittest
+from asobibi import schema, validator, Op, Int, field
+from asobibi.declarative import as_schema, column
+
+
+def ordered(k, x, y):
+    assert x < y
+
+Point = schema("Point", [("x", {Op.converters: [Int]}),
+                         ("y", {Op.converters: [Int]})])
+OrderedValidator = validator("OrderedValidator", [(("x", "y"), ordered)])
+
+
+@as_schema()
+class DeclarativePoint(object):
+    x = column(field(converters=[Int]))
+    y = column(field(converters=[Int]))
+
+
+class ParallelTests(unittest.TestCase):
+
+    def test_reference(self):
+        from asobibi.parallel import as_reference
+        self.assertEqual(as_reference(Point), "tests.test_parallel:Point")
+        self.assertEqual(as_reference("tests.test_parallel:Point"), "tests.test_parallel:Point")
+
+    def test_reference__not_importable(self):
+        from asobibi.parallel import as_reference
+        from asobibi import ConstructionError
+        LocalValidator = validator("LocalValidator", [(("x", "y"), ordered)])
+        with self.assertRaises(ConstructionError):
+            as_reference(LocalValidator)
+
+    def test_reference__not_importable_schema__by_definition(self):
+        from asobibi.parallel import as_reference, resolve
+        Local = schema("Local", [("x", {Op.converters: [Int]})])
+        ref = as_reference(Local)
+        self.assertEqual(ref["name"], "Local")
+        self.assertEqual(dict(next(resolve(ref).validate_many([{"x": "1"}]))[1]), {"x": 1})
+
+    def test_pickle(self):
+        import pickle
+        from asobibi import Nil
+        self.assertIs(pickle.loads(pickle.dumps(Point)), Point)
+        self.assertIs(pickle.loads(pickle.dumps(Nil)), Nil)
+
+    def test_declarative(self):
+        import pickle
+        from asobibi.parallel import as_reference, validate_parallel
+        self.assertEqual(DeclarativePoint.__name__, "DeclarativePoint")
+        self.assertEqual(as_reference(DeclarativePoint), "tests.test_parallel:DeclarativePoint")
+        self.assertIs(pickle.loads(pickle.dumps(DeclarativePoint)), DeclarativePoint)
+
+        records = [{"x": str(i), "y": "a" if i % 3 else str(i)} for i in range(10)]
+        result = list(validate_parallel(DeclarativePoint, records, chunksize=3, max_workers=2))
+        expected = list(DeclarativePoint.validate_many(records))
+        self.assertEqual([dict(r) for _, r, _ in result], [dict(r) for _, r, _ in expected])
+        self.assertEqual([str(e) for _, _, e in result], [str(e) for _, _, e in expected])
+
+    def test_it(self):
+        from asobibi.parallel import validate_parallel
+        records = [{"x": str(i), "y": str(i % 7)} for i in range(50)]
+        result = list(validate_parallel(Point, records, validators=[OrderedValidator],
+                                        chunksize=7, max_workers=2))
+
+        expected = list(Point.validate_many(records, validators=[OrderedValidator]))
+        self.assertEqual([i for i, _, _ in result], list(range(50)))
+        self.assertEqual([dict(r) for _, r, _ in result], [dict(r) for _, r, _ in expected])
+        self.assertEqual([str(e) for _, _, e in result], [str(e) for _, _, e in expected])
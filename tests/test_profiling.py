@@ -0,0 +1,79 @@
+# -*- coding:utf-8 -*-
+import unittest
+
+
+class ProfilingTests(unittest.TestCase):
+    def _get_schema(self, **kwargs):
+        from asobibi import schema, Op, Int
+        return schema("Point", [("x", {Op.converters: [Int]}),
+                                ("y", {Op.converters: [Int]})], **kwargs)
+
+    def _get_validator(self):
+        from asobibi import validator
+
+        def ordered(k, x, y):
+            assert x < y
+        return validator("Ordered", [(("x", "y"), ordered)])
+
+    def _assert_stats(self, profiler):
+        stats = dict(((schema, field, converter), (stat.calls, stat.failures))
+                     for schema, field, converter, stat in profiler.rows())
+        self.assertEqual(stats, {("Point", "x", "Int"): (2, 0),
+                                 ("Point", "y", "Int"): (2, 1),
+                                 ("Ordered", "x,y", "ordered"): (2, 2)})
+
+    def test_it(self):
+        from asobibi import profiling
+        Point, Ordered = self._get_schema(), self._get_validator()
+        with profiling.profile() as profiler:
+            self.assertFalse(Ordered(Point(x="1", y="a")).validate())
+            self.assertFalse(Ordered(Point(x="2", y="1")).validate())
+        self._assert_stats(profiler)
+        self.assertIn("Ordered  x,y    ordered", profiler.table())
+        self.assertIsNone(profiling.current)
+
+    def test_compiled(self):
+        from asobibi import profiling
+        Point, Ordered = self._get_schema(compiled=True), self._get_validator()
+        with profiling.profile() as profiler:
+            self.assertFalse(Ordered(Point(x="1", y="a")).validate())
+            self.assertFalse(Ordered(Point(x="2", y="1")).validate())
+        self._assert_stats(profiler)
+
+    def test_custom_opt_handler(self):
+        from asobibi import profiling, schema, Int
+        from asobibi.construct import _OptionHandler
+
+        class OptionHandler(_OptionHandler):
+            @classmethod
+            def get_converters(cls, options):
+                return options.get("convert", ())
+
+        Point = schema("Point", [("x", {"convert": [Int]}), ("y", {"convert": [Int]})], opt_handler=OptionHandler)
+        with profiling.profile() as profiler:
+            pt = Point(x="1", y="a")
+            self.assertFalse(pt.validate())
+        self.assertEqual(list(pt.errors.keys()), ["y"])
+        stats = dict(((field, converter), (stat.calls, stat.failures))
+                     for _, field, converter, stat in profiler.rows())
+        self.assertEqual(stats, {("x", "Int"): (1, 0), ("y", "Int"): (1, 1)})
+
+    def test_clear(self):
+        from asobibi import profiling
+        for options in [{}, {"compiled": True}]:
+            Point, Ordered = self._get_schema(**options), self._get_validator()
+            with profiling.profile() as profiler:
+                self.assertTrue(Ordered(Point(x="1", y="2")).validate())
+                profiler.clear()
+                self.assertEqual(profiler.rows(), [])
+                self.assertFalse(Ordered(Point(x="1", y="a")).validate())
+                self.assertFalse(Ordered(Point(x="2", y="1")).validate())
+            self._assert_stats(profiler)
+
+    def test_disabled(self):
+        from asobibi import profiling
+        profiler = profiling.Profiler()
+        with profiling.profile(profiler):
+            pass
+        self.assertTrue(self._get_schema()(x="1", y="2").validate())
+        self.assertEqual(profiler.rows(), [])
@@ -0,0 +1,122 @@
+# -*- coding:utf-8 -*-
+import unittest
+from asobibi import schema, Op, Int, Unicode, as_converter, validation_from_condition, field
+from asobibi.declarative import as_schema, column
+
+
+@validation_from_condition
+def positive(x):
+    return x > 0
+
+Address = schema("Address", [("city", {Op.converters: [Unicode]})])
+
+
+@as_schema(compiled=True)
+class Point(object):
+    x = column(field(converters=[Int, positive]))
+    y = column(field(required=False))
+
+
+class SerializeTests(unittest.TestCase):
+
+    def _make_schema(self, **kwargs):
+        # not importable (defined in function)
+        return schema("Tenant", [("name", {Op.converters: [Unicode]}),
+                                 ("age", {Op.converters: [Int, positive], Op.required: False}),
+                                 ("score", {Op.initial: 0}),
+                                 ("address", {Op.converters: [as_converter(Address)]})],
+                      **kwargs)
+
+    def test_definition__roundtrip(self):
+        import json
+        from asobibi.serialize import definition, build, fingerprint
+        Tenant = self._make_schema(compiled=True)
+        d = definition(Tenant)
+        loaded = json.loads(json.dumps(d))
+        self.assertEqual(fingerprint(loaded), fingerprint(d))
+
+        Rebuilt = build(loaded)
+        self.assertEqual(Rebuilt.__name__, "Tenant")
+        self.assertEqual(definition(Rebuilt), d)
+        for data in [{"name": "foo", "age": "20", "address": {"city": "tokyo"}},
+                     {"name": "foo", "age": "-1", "address": {}}]:
+            expected, actual = Tenant(data), Rebuilt(data)
+            self.assertEqual(expected.validate(), actual.validate())
+            self.assertEqual(str(expected.errors), str(actual.errors))
+            self.assertEqual(expected.result, actual.result)
+
+    def test_definition__as_schema(self):
+        import json
+        from asobibi.serialize import definition, build
+        d = definition(Point)
+        self.assertEqual(d["name"], "Point")
+        self.assertIsNone(d["options"]["base"])
+        Rebuilt = build(json.loads(json.dumps(d)))
+        self.assertEqual(definition(Rebuilt), d)
+        for data in [{"x": "1", "y": "y"}, {"x": "-1"}]:
+            expected, actual = Point(data), Rebuilt(data)
+            self.assertEqual(expected.validate(), actual.validate())
+            self.assertEqual(str(expected.errors), str(actual.errors))
+            self.assertEqual(expected.result, actual.result)
+
+    def test_fingerprint__changes_with_options(self):
+        from asobibi.serialize import definition, fingerprint
+        self.assertNotEqual(fingerprint(definition(self._make_schema())),
+                            fingerprint(definition(self._make_schema(fail_fast=True))))
+
+    def test_definition__not_importable_converter(self):
+        from asobibi.serialize import definition
+        from asobibi import ConstructionError
+        Local = schema("Local", [("x", {Op.converters: [lambda k, x: x]})])
+        with self.assertRaises(ConstructionError):
+            definition(Local)
+
+    def test_pickle(self):
+        import pickle
+        from asobibi.serialize import pickleable, load, definition
+        Tenant = self._make_schema()
+        Unpickled = pickle.loads(pickle.dumps(pickleable(Tenant)))
+        self.assertEqual(definition(Unpickled), definition(Tenant))
+        self.assertIs(Unpickled, load(definition(Tenant)))
+
+    def test_plan_cache(self):
+        import shutil
+        import tempfile
+        from asobibi.serialize import PlanCache, definition, fingerprint, build
+        d = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, d)
+        cache = PlanCache(d)
+
+        Point = schema("Point", [("x", {Op.converters: [Int, positive]}), ("y", {})], compiled=True)
+        definition_ = definition(Point)
+        key = fingerprint(definition_)
+        self.assertIsNone(cache.get(key))
+        build(definition_, cache=cache)
+        self.assertEqual(cache.get(key), Point._plan)
+
+        Rebuilt = build(definition_, cache=cache)
+        target = Rebuilt(x="1", y="y")
+        self.assertTrue(target.validate())
+        self.assertEqual(dict(target.result), {"x": 1, "y": "y"})
+
+    def test_plan_cache__nested(self):
+        import shutil
+        import tempfile
+        from asobibi.serialize import PlanCache, definition, fingerprint, build
+        d = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, d)
+        cache = PlanCache(d)
+        Tenant = self._make_schema(flatten=True)
+        definition_ = definition(Tenant)
+        build(definition_, cache=cache)
+        plan = cache.get(fingerprint(definition_))  # nested schema is pickled by definition
+        self.assertIsNotNone(plan)
+        self.assertEqual([k for k, _, _ in plan], ["name", "age", "score", "address"])
+        self.assertEqual([k for k, _, _ in plan[-1][2].plan], ["city"])
+
+        Rebuilt = build(definition_, cache=cache)
+        for data in [{"name": "foo", "address": {"city": "tokyo"}}, {"name": "foo", "age": "-1", "address": {}}]:
+            expected, actual = Tenant(data), Rebuilt(data)
+            self.assertEqual(expected.validate(), actual.validate())
+            self.assertEqual(str(expected.errors), str(actual.errors))
+            self.assertEqual(expected.result, actual.result)
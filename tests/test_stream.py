@@ -0,0 +1,55 @@
+# -*- coding:utf-8 -*-
+import unittest
+
+
+def _get_schema():
+    from asobibi import schema, Op, Int, Unicode
+    return schema("Person", [("name", {Op.converters: [Unicode]}),
+                             ("age", {Op.converters: [Int]})])
+
+
+class StreamTests(unittest.TestCase):
+
+    def test_csv(self):
+        from asobibi.compat import NativeIO
+        from asobibi.stream import validate_csv
+        fp = NativeIO(u"name,age\nfoo,20\nbar,x\nboo,30\n")
+
+        errors = []
+        result = validate_csv(fp, _get_schema(), on_error=lambda i, r, e: errors.append((i, list(e.keys()))))
+        self.assertEqual([dict(r) for r in result], [{"name": "foo", "age": 20}, {"name": "boo", "age": 30}])
+        self.assertEqual(errors, [(1, ["age"])])
+
+    def test_jsonlines(self):
+        from asobibi.compat import NativeIO
+        from asobibi.stream import validate_jsonlines
+        fp = NativeIO(u'{"name": "foo", "age": "20"}\n\n{"name": "bar"}\n')
+
+        errors = []
+        result = validate_jsonlines(fp, _get_schema(), on_error=lambda i, r, e: errors.append((i, list(e.keys()))))
+        self.assertEqual([dict(r) for r in result], [{"name": "foo", "age": 20}])
+        self.assertEqual(errors, [(1, ["age"])])
+
+    def test_lazy(self):
+        from asobibi.stream import validate_stream
+
+        def records():
+            yield {"name": "foo", "age": "20"}
+            raise AssertionError("must not be consumed")
+
+        it = validate_stream(_get_schema(), records())
+        i, result, errors = next(it)
+        self.assertEqual((i, result["age"], errors), (0, 20, None))
+
+    def test_with_validator(self):
+        from asobibi import validator, WithExtra
+        from asobibi.stream import iterate_valid
+
+        @WithExtra
+        def adult(k, age, limit):
+            assert age >= limit
+        Validator = validator("Validator", [("age", adult)])
+
+        records = [{"name": "foo", "age": "20"}, {"name": "bar", "age": "10"}]
+        result = iterate_valid(_get_schema(), records, validators=[Validator], extra={"limit": 18})
+        self.assertEqual([r["name"] for r in result], ["foo"])
@@ -40,5 +40,247 @@ class TranslationsTests(unittest.TestCase):
         self.assertEqual(translate("input", {"field": "field0"}), "NoInput field0")
         self.assertEqual(unicode_translate("input", {"field": "field0"}), u"ありません field0")
 
+
+class CompileFormatTests(unittest.TestCase):
+
+    def test_simple(self):
+        from asobibi.translations import compile_format, render_format
+        pieces = compile_format("{field} is {value!r:>5}.")
+        self.assertIsNotNone(pieces)
+        self.assertEqual(render_format(pieces, {"value": 1}, {"field": "x", "value": 0}),
+                         "{field} is {value!r:>5}.".format(field="x", value=1))
+
+    def test_not_simple(self):
+        from asobibi.translations import compile_format
+        self.assertIsNone(compile_format("{0} is {1}"))
+        self.assertIsNone(compile_format("{value.name}"))
+        self.assertIsNone(compile_format("{value:{width}}"))
+
+    def test_fallback(self):
+        from asobibi.translations import SystemMessage
+        s = SystemMessage("input", fmt="NoInput {field} {value[0]}", mapping={"field": "----", "value": [1]})
+        self.assertEqual(s({"value": [2]}), "NoInput ---- 2")
+        s = SystemMessage("input", fmt="NoInput {field}", mapping={"field": "----"}, force=True)
+        self.assertEqual(s({"value": [2]}), "NoInput ----")
+
+    def test_render_error_list(self):
+        from asobibi.exceptions import ValidationError
+        from asobibi.construct import ErrorList
+        errors = ErrorList({"x": [ValidationError(dict(name="*missing", field="x")), KeyError("x")],
+                            "y": [ValidationError(dict(fmt="{field} is invalid", field="y"))]})
+        self.assertEqual(errors.render(), {"x": ["x is Missing.", "'x'"], "y": ["y is invalid"]})
+        self.assertEqual(errors.render(), dict((k, [str(v) for v in vs]) for k, vs in errors.items()))
+
+    def test_render_error_list__nested(self):
+        from asobibi import schema, Op, Int, as_converter
+        Person = schema("Person", [("name", {}), ("age", {Op.converters: [Int]})])
+        Group = schema("Group", [("person", {Op.converters: [as_converter(Person)]})])
+        target = Group(person={"age": "a"})
+        self.assertFalse(target.validate())
+        message = "invalid literal for int() with base 10: 'a'"
+        self.assertEqual(target.errors.render(),
+                         {"person": [{"name": ["name is Missing."], "age": [message]}]})
+        self.assertEqual(target.errors.render(display=True),
+                         {"person": [{"name": [u"name がみつかりません"], "age": [message]}]})
+
+
+class CatalogTests(unittest.TestCase):
+
+    def test_lookup__notfound__no_side_effect(self):
+        from asobibi import translations
+        from asobibi.translations import translate, unicode_translate, MessageStringNotFound
+        catalog = translations.get_catalog()
+        with self.assertRaises(MessageStringNotFound):
+            translate("missing-input", {}, category="unknown-category")
+        with self.assertRaises(MessageStringNotFound):
+            unicode_translate("missing-input", {})
+        self.assertIs(translations.get_catalog(), catalog)
+        self.assertFalse(translations.has_registry("unknown-category"))
+
+    def test_register__copy_on_write(self):
+        from asobibi import translations
+        from asobibi.translations import SystemMessage, translate
+        before = translations.get_catalog()
+        SystemMessage("cow", fmt="cow {field}", mapping={"field": "----"})
+        self.assertNotIn("cow", before.get("default", {}).get("system", {}))
+        self.assertEqual(translate("cow", {"field": "x"}), "cow x")
+
+    def test_get_registry__read_only(self):
+        from asobibi import translations
+        from asobibi.translations import SystemMessage, get_registry
+        SystemMessage("ro", fmt="ro", mapping={})
+        registry = get_registry()
+        with self.assertRaises(TypeError):
+            registry["system"] = {}
+        with self.assertRaises(TypeError):
+            registry["system"]["ro"] = None
+        self.assertIn("ro", translations.get_messages("system"))
+        with self.assertRaises(TypeError):
+            get_registry("unknown-category")["system"] = {}
+
+    def test_set_catalog(self):
+        from asobibi import translations
+        from asobibi.translations import build_message, translate, MessageStringNotFound
+        original = translations.get_catalog()
+        try:
+            translations.set_catalog({"default": {"system": {"swapped": build_message("swapped {field}", {"field": "-"})}}})
+            self.assertEqual(translate("swapped", {"field": "x"}), "swapped x")
+            with self.assertRaises(MessageStringNotFound):
+                translate("*missing", {"field": "x"})
+        finally:
+            translations.set_catalog(original)
+        self.assertEqual(translate("*missing", {"field": "x"}), "x is Missing.")
+
+
+class LocaleTests(unittest.TestCase):
+
+    def _make_directory(self, catalogs):
+        import os
+        import json
+        import shutil
+        import tempfile
+        d = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, d)
+        for lang, messages in catalogs.items():
+            with open(os.path.join(d, lang + ".json"), "w") as wf:
+                json.dump(messages, wf)
+        return d
+
+    def test_use_locale(self):
+        from asobibi.translations import SystemMessage, get_system_message_factory, translate, use_locale, get_system_lang
+        SystemMessage("greeting", fmt="hello {field}", mapping={"field": "-"})
+        get_system_message_factory(lang="locale-es")("greeting", fmt="hola {field}", mapping={"field": "-"})
+        with use_locale(system="locale-es"):
+            self.assertEqual(get_system_lang(), "locale-es")
+            self.assertEqual(translate("greeting", {"field": "x"}), "hola x")
+        self.assertEqual(translate("greeting", {"field": "x"}), "hello x")
+
+    def test_use_locale__per_thread(self):
+        import threading
+        from asobibi.translations import use_locale, get_system_lang
+        seen = []
+        with use_locale(system="locale-outer"):
+            t = threading.Thread(target=lambda: seen.append(get_system_lang()))
+            t.start()
+            t.join()
+        self.assertEqual(seen, ["system"])
+
+    def test_catalog_directory__lazy_loading(self):
+        from asobibi import translations
+        from asobibi.translations import translate, use_locale, MessageStringNotFound
+        from asobibi.exceptions import ValidationError
+        from asobibi.construct import ErrorList
+        original = translations.get_catalog()
+        self.addCleanup(translations.set_catalog, original)
+        d = self._make_directory({"xx": {"*missing": "{field} fehlt", "short": {"fmt": "{field}!", "mapping": {"field": "?"}}}})
+        translations.add_catalog_directory(d, category="locale-test")
+        self.addCleanup(translations._loaders.remove, ("locale-test", d))
+
+        self.assertFalse(translations.has_registry("locale-test"))
+        with use_locale(system="xx", display="xx"):
+            self.assertEqual(translate("*missing", {"field": "name"}, category="locale-test"), "name fehlt")
+            self.assertEqual(translate("short", {}, category="locale-test"), "?!")
+            with self.assertRaises(MessageStringNotFound):
+                translate("*missing", {"field": "name"}, category="locale-unknown")
+            errors = ErrorList({"name": [ValidationError(dict(name="*missing", field="name"))]})
+            self.assertEqual(errors.render(display=True, category="locale-test"), {"name": ["name fehlt"]})
+        self.assertTrue(translations.has_registry("locale-test"))
+
+        # unknown or unsafe language is not loaded
+        self.assertEqual(translations.get_messages("yy", category="locale-test"), {})
+        self.assertEqual(translations.get_messages("../xx", category="locale-test"), {})
+        self.assertNotIn("yy", translations.get_catalog()["locale-test"])
+
+    def test_catalog_directory__registry_exists(self):
+        from asobibi import translations
+        from asobibi.translations import translate, get_system_message_factory
+        original = translations.get_catalog()
+        self.addCleanup(translations.set_catalog, original)
+        get_system_message_factory(category="locale-test2", lang="ja")("registered", "registered {field}",
+                                                                         mapping={"field": "-"})
+        d = self._make_directory({"ja": {"registered": "from file", "extra": "extra {field}"},
+                                  "system": {"from-file": "{field} from file", "*missing": "overridden"}})
+        translations.add_catalog_directory(d, category="locale-test2")
+        self.addCleanup(translations._loaders.remove, ("locale-test2", d))
+        translations.add_catalog_directory(d)
+        self.addCleanup(translations._loaders.remove, ("default", d))
+
+        messages = translations.get_messages("ja", category="locale-test2")
+        self.assertEqual(messages["extra"]({"field": "x"}), "extra x")
+        self.assertEqual(messages["registered"]({"field": "x"}), "registered x")  # not overridden by file
+        self.assertEqual(translate("from-file", {"field": "x"}), "x from file")
+        self.assertEqual(translate("*missing", {"field": "x"}), "x is Missing.")
+
+
+class LazyDefaultsTests(unittest.TestCase):
+
+    def test_default_messages__registered_on_first_use(self):
+        import sys
+        import subprocess
+        script = "\n".join([
+            "import asobibi.translations as t",
+            "assert t._defaults_pending",
+            "assert t.translate('*missing', {'field': 'x'}) == 'x is Missing.'",
+            "assert not t._defaults_pending",
+        ])
+        subprocess.check_call([sys.executable, "-c", script])
+
+    def test_has_registry__before_first_use(self):
+        import sys
+        import subprocess
+        script = "\n".join([
+            "import asobibi.translations as t",
+            "assert t.has_registry()",
+            "assert t.has_registry('default')",
+        ])
+        subprocess.check_call([sys.executable, "-c", script])
+
+    def test_register_before_first_use(self):
+        import sys
+        import subprocess
+        script = "\n".join([
+            "import asobibi.translations as t",
+            "t.SystemMessage('custom', '{field}!', mapping={'field': '-'})",
+            "assert t.translate('custom', {'field': 'x'}) == 'x!'",
+            "assert t.translate('*missing', {'field': 'x'}) == 'x is Missing.'",
+        ])
+        subprocess.check_call([sys.executable, "-c", script])
+
+    def test_import__deferred_modules(self):
+        import sys
+        import subprocess
+        script = "\n".join([
+            "import sys",
+            "before = set(sys.modules)",
+            "import asobibi",
+            "loaded = set(sys.modules) - before",
+            "eager = loaded & set(['inspect', 'copy', 'json', 'threading', 'string', 'contextvars', 'contextlib',",
+            "                      'asobibi.profiling'])",
+            "assert not eager, sorted(eager)",
+        ])
+        subprocess.check_call([sys.executable, "-c", script])
+
+    def test_first_use__concurrently(self):
+        import sys
+        import subprocess
+        script = "\n".join([
+            "import time, threading",
+            "import asobibi.translations as t",
+            "build_message = t.build_message",
+            "def slow_build_message(fmt, mapping):",
+            "    time.sleep(0.05)",
+            "    return build_message(fmt, mapping)",
+            "t.build_message = slow_build_message",
+            "results = []",
+            "def use():",
+            "    results.append(t.translate('*missing', {'field': 'x'}))",
+            "threads = [threading.Thread(target=use) for _ in range(4)]",
+            "[th.start() for th in threads]",
+            "[th.join() for th in threads]",
+            "assert results == ['x is Missing.'] * 4, results",
+        ])
+        subprocess.check_call([sys.executable, "-c", script])
+
+
 if __name__ == "__main__":
     unittest.main()